@@ -255,9 +255,9 @@ class KH2ItemStat(KH2Location):
     def getDescription(self):
         return self.Name
 
-    def setStats(self, statMin, statMax):
-        self.Attack = random.randint(statMin, statMax)
-        self.Magic = random.randint(statMin, statMax)
+    def setStats(self, statMin, statMax, rng=random):
+        self.Attack = rng.randint(statMin, statMax)
+        self.Magic = rng.randint(statMin, statMax)
 
 
 @dataclass(unsafe_hash=True, eq=True, repr=True)
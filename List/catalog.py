@@ -0,0 +1,60 @@
+from List.LocationList import Locations
+from List.ItemList import Items
+
+
+# The location and item lists only depend on the max logic setting, so they are built once at import time.
+# Seeds never touch these prototypes, every seed works on its own copies from instantiate() instead.
+
+class LocationCatalog:
+    def __init__(self, maxItemLogic):
+        soraLocations = Locations.getTreasureList(maxItemLogic) + Locations.getSoraLevelList() + Locations.getSoraBonusList(maxItemLogic) + Locations.getFormLevelList(maxItemLogic) + Locations.getPuzzleLocations() + Locations.getSoraWeaponList() + Locations.getSoraStartingItemList()
+        goofyLocations = Locations.getGoofyWeaponList() + Locations.getGoofyStartingItemList() + Locations.getGoofyBonusList()
+        donaldLocations = Locations.getDonaldWeaponList() + Locations.getDonaldStartingItemList() + Locations.getDonaldBonusList()
+
+        # starting items are listed several times as the same object, so every list is stored as indices into the unique prototypes
+        prototypeIndex = {}
+        prototypes = []
+        def indices(locations):
+            for location in locations:
+                if id(location) not in prototypeIndex:
+                    prototypeIndex[id(location)] = len(prototypes)
+                    # rewards, invalid checks and starting items are mutated per seed, those lists need their own copy
+                    listAttributes = tuple(name for name, value in location.__dict__.items() if isinstance(value, list))
+                    prototypes.append((type(location), dict(location.__dict__), listAttributes))
+            return tuple(prototypeIndex[id(location)] for location in locations)
+
+        self._soraIndices = indices(soraLocations)
+        self._goofyIndices = indices(goofyLocations)
+        self._donaldIndices = indices(donaldLocations)
+        self._prototypes = tuple(prototypes)
+
+    def instantiate(self):
+        clones = []
+        for cls, attributes, listAttributes in self._prototypes:
+            clone = object.__new__(cls)
+            cloneAttributes = clone.__dict__
+            cloneAttributes.update(attributes)
+            for name in listAttributes:
+                cloneAttributes[name] = cloneAttributes[name][:]
+            clones.append(clone)
+        return [clones[i] for i in self._soraIndices], [clones[i] for i in self._goofyIndices], [clones[i] for i in self._donaldIndices]
+
+
+class ItemCatalog:
+    # KH2Item is frozen, so the item lists can be shared as tuples
+    itemList = tuple(Items.getItemList())
+    supportAbilityList = tuple(Items.getSupportAbilityList())
+    actionAbilityList = tuple(Items.getActionAbilityList())
+    goofyAbilityList = tuple(Items.getGoofyAbilityList())
+    donaldAbilityList = tuple(Items.getDonaldAbilityList())
+    junkList = tuple(Items.getJunkList(False))
+    betterJunkList = tuple(Items.getJunkList(True))
+
+    def getJunkList(betterJunk):
+        return ItemCatalog.betterJunkList if betterJunk else ItemCatalog.junkList
+
+
+locationCatalogs = {maxItemLogic: LocationCatalog(maxItemLogic) for maxItemLogic in (False, True)}
+
+def getLocationCatalog(maxItemLogic):
+    return locationCatalogs[bool(maxItemLogic)]
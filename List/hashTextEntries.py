@@ -40,5 +40,5 @@ hashTextEntries = [
 #    "button-circle",
 ]
 
-def generateHashIcons():
-    return random.choices(hashTextEntries, k=7)
+def generateHashIcons(rng=random):
+    return rng.choices(hashTextEntries, k=7)
@@ -0,0 +1,96 @@
+import array, copy, os, sys, threading, zipfile, zlib
+from collections import namedtuple, OrderedDict
+
+# The static files generateZip puts into every archive, read from disk once per process and kept as bytes.
+
+rootPath = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# a member that is the same in every archive, info already holds its CRC and sizes
+PreparedMember = namedtuple("PreparedMember", "info data")
+
+assetCache = {}
+memberCache = {}
+
+
+def getAsset(path):
+    # path relative to the repository root, the bytes are shared so they must not be changed
+    if path not in assetCache:
+        with open(os.path.join(rootPath, path), "rb") as assetFile:
+            assetCache[path] = assetFile.read()
+    return assetCache[path]
+
+
+def getTextAsset(path):
+    key = ("text", path)
+    if key not in assetCache:
+        # read the way open() in text mode reads it
+        assetCache[key] = getAsset(path).decode().replace("\r\n", "\n").replace("\r", "\n")
+    return assetCache[key]
+
+
+def getMember(path, name):
+    # the zip entry outZip.write(path, name) would write, with the file's date and permissions
+    key = (path, name)
+    if key not in memberCache:
+        data = getAsset(path)
+        info = zipfile.ZipInfo.from_file(os.path.join(rootPath, path), name)
+        info.compress_type = zipfile.ZIP_STORED
+        info.file_size = info.compress_size = len(data)
+        info.CRC = zlib.crc32(data)
+        memberCache[key] = PreparedMember(info, data)
+    return memberCache[key]
+
+
+def writeMember(outZip, member):
+    # zipfile keeps the info it is given, each archive gets its own copy. A SeedArchive takes the member as it
+    # is, a plain ZipFile computes the CRC again
+    if hasattr(outZip, "writePrepared"):
+        outZip.writePrepared(copy.copy(member.info), member.data)
+    else:
+        outZip.writestr(copy.copy(member.info), member.data)
+
+
+puzzleLayouts = {}
+puzzleBars = OrderedDict()
+puzzleBarsLock = threading.Lock()
+puzzleBarsSize = 32
+
+
+def getPuzzleLayout(offsets):
+    # the puzzles sit at even offsets a fixed stride apart, their item ids are then one strided slice of
+    # the bar read as u16, the slice bounds or None when the offsets don't line up like that
+    if offsets not in puzzleLayouts:
+        layout = None
+        if offsets and all(byte1 == byte0 + 1 and byte0 % 2 == 0 for byte0, byte1 in offsets):
+            starts = [byte0 // 2 for byte0, byte1 in offsets]
+            step = starts[1] - starts[0] if len(starts) > 1 else 1
+            if step > 0 and starts == list(range(starts[0], starts[0] + step * len(starts), step)):
+                layout = slice(starts[0], starts[-1] + 1, step)
+        puzzleLayouts[offsets] = layout
+    return puzzleLayouts[offsets]
+
+
+def getPuzzleBar(rewards):
+    # jiminy.bar with the puzzle rewards, rewards holds (byte0, byte1, itemId) for each puzzle as little
+    # endian u16 ids. The bar only depends on them, so the same rewards give back the same read only buffer.
+    with puzzleBarsLock:
+        if rewards in puzzleBars:
+            puzzleBars.move_to_end(rewards)
+            return puzzleBars[rewards]
+    binaryContent = bytearray(getAsset("static/jiminy.bar"))
+    layout = getPuzzleLayout(tuple((byte0, byte1) for byte0, byte1, item in rewards))
+    if layout is not None and len(binaryContent) % 2 == 0:
+        items = array.array("H", [item for byte0, byte1, item in rewards])
+        if sys.byteorder == "big":
+            items.byteswap()
+        memoryview(binaryContent).cast("H")[layout] = items
+    else:
+        for byte0, byte1, item in rewards:
+            binaryContent[byte0] = item & 0x00FF
+            binaryContent[byte1] = item >> 8
+    bar = memoryview(binaryContent).toreadonly()
+    with puzzleBarsLock:
+        puzzleBars[rewards] = bar
+        while len(puzzleBars) > puzzleBarsSize:
+            puzzleBars.popitem(last=False)
+    return bar
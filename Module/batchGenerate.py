@@ -0,0 +1,87 @@
+import argparse, copy, hashlib, json, os, random, time
+from multiprocessing import Pool
+
+from List.hashTextEntries import generateHashIcons
+from Module.seedGeneration import SeedGenerator, addModifierStartingInventory, seedNameCharacters
+
+# Generates many seeds with the same settings without the web app:
+#   python -m Module.batchGenerate settings.json --count 100 --output seeds/
+#   python -m Module.batchGenerate settings.json --names race1 race2 --output seeds/
+# settings.json holds the same keys as the session used by randomizePage, plus optional platform, cmdMenuChoice, randomBGM
+# and compression (stored, fast or small).
+
+
+def randomSeedName():
+    return ''.join(random.SystemRandom().choice(seedNameCharacters) for i in range(30))
+
+
+def generateSeed(settings, seedName, outputDirectory):
+    start = time.perf_counter()
+    sessionDict = copy.deepcopy(settings)
+    platform = sessionDict.pop("platform", "PCSX2")
+    cmdMenuChoice = sessionDict.pop("cmdMenuChoice", "vanilla")
+    randomBGM = sessionDict.pop("randomBGM", [])
+    compression = sessionDict.pop("compression", "stored")
+    sessionDict["seed"] = seedName
+    if not sessionDict.get("seedHashIcons"):
+        # every seed of a batch gets its own icons, derived from its name so reruns match
+        sessionDict["seedHashIcons"] = generateHashIcons(random.Random(seedName))
+    if isinstance(sessionDict.get("enemyOptions"), dict):
+        sessionDict["enemyOptions"] = json.dumps(sessionDict["enemyOptions"])
+    addModifierStartingInventory(sessionDict)
+
+    randomizer, hintsText = SeedGenerator(sessionDict).search()
+
+    fileName = seedName + ".zip"
+    with open(os.path.join(outputDirectory, fileName), "w+b") as outFile:
+        randomizer.generateZip(randomBGM = randomBGM, platform = platform, startingInventory = sessionDict["startingInventory"], hintsText = hintsText, cmdMenuChoice = cmdMenuChoice, spoilerLog = bool(sessionDict["spoilerLog"]), enemyOptions = json.loads(sessionDict["enemyOptions"]), outFile = outFile, compression = compression)
+        outFile.seek(0)
+        digest = hashlib.sha256()
+        for chunk in iter(lambda: outFile.read(1 << 16), b""):
+            digest.update(chunk)
+    return {
+        "seed": seedName,
+        "file": fileName,
+        "seedHashIcons": sessionDict["seedHashIcons"],
+        "sha256": digest.hexdigest(),
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+def generateSeedArgs(args):
+    return generateSeed(*args)
+
+
+def generateBatch(settings, seedNames, outputDirectory, processes=None):
+    os.makedirs(outputDirectory, exist_ok=True)
+    jobs = [(settings, seedName, outputDirectory) for seedName in seedNames]
+    if processes == 1:
+        return [generateSeed(*job) for job in jobs]
+    with Pool(processes) as pool:
+        return pool.map(generateSeedArgs, jobs, chunksize=1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a batch of seeds with identical settings.")
+    parser.add_argument("settings", help="settings json, in the format of the web session")
+    names = parser.add_mutually_exclusive_group(required=True)
+    names.add_argument("--count", type=int, help="number of seeds with random names")
+    names.add_argument("--names", nargs="+", help="seed names to generate")
+    parser.add_argument("--output", default="seeds", help="directory the zips and manifest.json are written to")
+    parser.add_argument("--processes", type=int, default=None, help="worker processes, defaults to the number of cores")
+    args = parser.parse_args(argv)
+
+    with open(args.settings) as settingsFile:
+        settings = json.load(settingsFile)
+    seedNames = args.names or [randomSeedName() for i in range(args.count)]
+    outputDirectory = os.path.abspath(args.output)
+
+    start = time.perf_counter()
+    manifest = generateBatch(settings, seedNames, outputDirectory, args.processes)
+    with open(os.path.join(outputDirectory, "manifest.json"), "w") as manifestFile:
+        json.dump({"settings": settings, "seconds": round(time.perf_counter() - start, 3), "seeds": manifest}, manifestFile, indent=4)
+    print("Generated {} seeds into {}".format(len(manifest), outputDirectory))
+
+
+if __name__ == '__main__':
+    main()
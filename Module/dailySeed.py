@@ -148,8 +148,10 @@ dailyModifiers = [
                 )
 ]
 
-def getDailyModifiers(date):
-    random.seed(date.strftime('%D'))
+def getDailyModifiers(date, rng=None):
+    # the same modifiers for everyone on a given day, drawn without touching the global generator
+    if rng is None:
+        rng = random.Random(date.strftime('%D'))
     # Weekends have more modifiers
     numMods = 3 if date.isoweekday() < 5 else 5
     chosenMods = []
@@ -165,7 +167,7 @@ def getDailyModifiers(date):
             if m.name in [m.name for m in chosenMods]:
                 continue
             availableMods.append(m)
-        chosen = random.choice(availableMods)
+        chosen = rng.choice(availableMods)
         chosenMods.append(chosen)
         for c in chosen.categories:
             usedCategories.add(c)
@@ -178,12 +180,13 @@ def generateDailySeed():
     session = dict(get_default_settings())
     session["dailyModifiers"] = []
     currentDate = datetime.date.today()
-    modifiers = getDailyModifiers(currentDate)
+    rng = random.Random(currentDate.strftime('%D'))
+    modifiers = getDailyModifiers(currentDate, rng)
     for mod in modifiers:
         mod.modifier(session)
         session["dailyModifiers"].append(mod.name)
     session["seed"] = "Daily Seed " + currentDate.strftime('%D')
-    session['seedHashIcons'] = generateHashIcons()
+    session['seedHashIcons'] = generateHashIcons(rng)
     return session
 
 if __name__ == '__main__':
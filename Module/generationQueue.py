@@ -0,0 +1,62 @@
+import collections, threading
+
+
+# Both queues run jobs as jobFunction(sid, *args) and report back to the requesting client through publish(sid, event, payload).
+# submit() returns the queue position, or None when the queue is full and the job was rejected.
+
+class LocalGenerationQueue:
+    # bounded pool of worker threads inside the web process, used in development mode and in tests
+    def __init__(self, publish, workers=2, maxPending=10):
+        self.publish = publish
+        self.maxPending = maxPending
+        self._pending = collections.deque()
+        self._condition = threading.Condition()
+        for i in range(workers):
+            threading.Thread(target=self._work, daemon=True).start()
+
+    def submit(self, sid, jobFunction, *args):
+        with self._condition:
+            if len(self._pending) >= self.maxPending:
+                return None
+            self._pending.append((sid, jobFunction, args))
+            position = len(self._pending)
+            self._condition.notify()
+        self.publish(sid, "queued", {"position": position})
+        return position
+
+    def _work(self):
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+                sid, jobFunction, args = self._pending.popleft()
+                waiting = [waitingSid for waitingSid, _, _ in self._pending]
+            for position, waitingSid in enumerate(waiting, 1):
+                self.publish(waitingSid, "queued", {"position": position})
+            try:
+                jobFunction(sid, *args)
+            except Exception as err:
+                print("ERROR: ", err.args)
+                self.publish(sid, "generation_failed", {})
+
+
+class RedisGenerationQueue:
+    # jobs are run by rq workers in their own processes (see worker.py), so the web process only enqueues
+    def __init__(self, publish, connection, maxPending=10, jobTimeout=300):
+        from rq import Queue
+        self.publish = publish
+        self.maxPending = maxPending
+        self.queue = Queue("generation", connection=connection, default_timeout=jobTimeout)
+
+    def submit(self, sid, jobFunction, *args):
+        if len(self.queue) >= self.maxPending:
+            return None
+        self.queue.enqueue(jobFunction, sid, *args, meta={"sid": sid})
+        position = len(self.queue)
+        self.publish(sid, "queued", {"position": position})
+        return position
+
+    def publishPositions(self):
+        # called by a worker when it picks up a job, the jobs still waiting moved up by one
+        for position, job in enumerate(self.queue.jobs, 1):
+            self.publish(job.meta.get("sid"), "queued", {"position": position})
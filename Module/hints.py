@@ -5,7 +5,7 @@ from itertools import permutations
 
 
 class Hints:
-    def generateHints(locationItems, hintsType, seedName, excludeList, preventSelfHinting=True, allowProofHinting=True):
+    def generateHints(locationItems, hintsType, seedName, excludeList, preventSelfHinting=True, allowProofHinting=True, rng=random):
         if hintsType=="Disabled":
             return None
         hintsText = {}
@@ -123,7 +123,7 @@ class Hints:
                 reportOrdering = []
                 for o in temp_ordering:
                     reportOrdering.append(o)
-                random.shuffle(reportOrdering)
+                rng.shuffle(reportOrdering)
                 # for each assignment of reports to proof locations, try to assign hints to reports
                 for ordering in reportOrdering:
                     remaining_report_slots = 13-len(worldsToHint)
@@ -172,7 +172,7 @@ class Hints:
                                     reportNumber = proof_report_order[index]
                                     reportsList.remove(reportNumber)
                                 else:
-                                    random.shuffle(reportsList)
+                                    rng.shuffle(reportsList)
                                     for maybeReportNumber in reportsList:
                                         if world not in reportRestrictions[maybeReportNumber-1]:
                                             reportsList.remove(maybeReportNumber)
@@ -198,9 +198,9 @@ class Hints:
 
             # slack worlds to hint, can point to anywhere
             while len(reportsList) > 0:
-                random.shuffle(reportsList)
+                rng.shuffle(reportsList)
                 worlds = list(worldChecks.keys())
-                random.shuffle(worlds)
+                rng.shuffle(worlds)
                 randomWorld = None
 
                 if (worlds[0] not in worldsToHint) and (worlds[0] not in reportRestrictions[reportsList[0]-1]):
@@ -279,8 +279,8 @@ class Hints:
                     if place not in tempExcludeList:
                         worlds.append(place)
             
-                random.shuffle(reportsList)
-                random.shuffle(worlds)
+                rng.shuffle(reportsList)
+                rng.shuffle(worlds)
                 randomWorld = None
                 
                 #reset list
@@ -305,7 +305,7 @@ class Hints:
                     tempExcludeList.append(worlds[0])
                     continue
                     
-                randomItem = random.choice(worldChecksEdit[randomWorld])
+                randomItem = rng.choice(worldChecksEdit[randomWorld])
                 #print("Report " + str(reportNumber) + ": World = " + randomWorld +" | item = " + randomItem.Name)
 
                 #compare current selected world and item to previously rerolled reports
@@ -349,7 +349,7 @@ class Hints:
                         reportsList.append(reportNumber)
                         continue
                         
-                    random_number = random.randint(1, 3)
+                    random_number = rng.randint(1, 3)
                     #print("Random number = " + str(random_number))
                     #print("Report found! does " + str(random_number) + " = 1?")
                     
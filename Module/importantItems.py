@@ -11,6 +11,18 @@ def getImportantChecks():
             524 #promise charm
     ] + getSCOM()
 
+# every item ItemPlacementRestriction checks for, placed first when placement is logic aware
+def getLogicItems():
+    return [21,22,23, #magic
+            87, #magnet
+            94,95,96,97,98,99,100,101,102,103,104,105,106,107,108,109, #growths
+            593,595, # proofs
+            26,27,29,31,563, # forms
+            385,386,387,388,568, # auto forms
+            159,160,25,383, #summons
+            32 #pages
+    ]
+
 def getReports():
     return [226,227,228,229,230,231,232,233,234,235,236,237,238]
 
@@ -0,0 +1,222 @@
+import json, os
+from collections import namedtuple
+
+# The placement logic lives in placementRules.json as requirement trees, a node is one of
+#   "name"                                      a rule from "definitions"
+#   {"item": id}                                the item is in the inventory
+#   {"item": id, "atLeast": n} / "exactly": n   how many copies of the item are in the inventory
+#   {"all": [nodes]} / {"any": [nodes]}         every / at least one of the nodes holds
+#   {"not": node}
+#   {"count": [nodes], "atLeast": n} / "exactly": n   how many of the nodes hold
+# Each tree is compiled once, straight into closures, into a predicate over anything with `in` and count()
+# (lists and Inventory) and the item ids it depends on. An all/any/count node over items that only have to be present becomes
+# one test against a bit mask with bit 1 << id per item, inventories that keep such a mask (Inventory)
+# answer it with a single and, anything else has its mask built from `in`.
+
+rulesPath = os.path.join(os.path.dirname(os.path.abspath(__file__)), "placementRules.json")
+
+CompiledRule = namedtuple("CompiledRule", "predicate dependencies")
+
+
+def maskTest(itemIds, kind, target=None):
+    # all/any/count of items that only have to be present, as one test against their bits. Inventories without
+    # presentMask() (lists) have their bits built from `in`. With kind "count" the number of items held is returned
+    mask = sum(1 << itemId for itemId in itemIds)
+    def predicate(inventory):
+        try:
+            present = inventory.presentMask(mask, itemIds)
+        except AttributeError:
+            present = sum(1 << itemId for itemId in itemIds if itemId in inventory)
+        if kind == "all":
+            return present == mask
+        if kind == "any":
+            return present != 0
+        if kind == "atLeast":
+            return bin(present).count("1") >= target
+        if kind == "exactly":
+            return bin(present).count("1") == target
+        return bin(present).count("1")
+    return predicate
+
+
+def allOf(predicates):
+    # chained instead of all() over a generator, the rules are evaluated far more often than they are built
+    if not predicates:
+        return lambda inventory: True
+    first, rest = predicates[0], predicates[1:]
+    if not rest:
+        return first
+    rest = allOf(rest)
+    return lambda inventory: first(inventory) and rest(inventory)
+
+
+def anyOf(predicates):
+    if not predicates:
+        return lambda inventory: False
+    first, rest = predicates[0], predicates[1:]
+    if not rest:
+        return first
+    rest = anyOf(rest)
+    return lambda inventory: first(inventory) or rest(inventory)
+
+
+def sumOf(predicates):
+    # every predicate returns a bool or, for a count of present items, an int
+    if not predicates:
+        return lambda inventory: 0
+    first, rest = predicates[0], predicates[1:]
+    if not rest:
+        return first
+    rest = sumOf(rest)
+    return lambda inventory: first(inventory) + rest(inventory)
+
+
+class LogicRuleCompiler:
+    def __init__(self, document):
+        self.definitions = document.get("definitions", {})
+        self.document = document
+        self._compiled = {}
+
+    def resolve(self, node, seen):
+        # follows named rules to the node they stand for, seen holds the names on the way to catch cycles
+        while isinstance(node, str):
+            if node not in self.definitions:
+                raise ValueError("Unknown logic rule {}".format(node))
+            if node in seen:
+                raise ValueError("Logic rule {} refers to itself".format(node))
+            seen = seen + (node,)
+            node = self.definitions[node]
+        return node, seen
+
+    def collectItems(self, node):
+        if isinstance(node, dict):
+            items = {node["item"]} if "item" in node else set()
+            for value in node.values():
+                items |= self.collectItems(value)
+            return items
+        if isinstance(node, list):
+            return set().union(*(self.collectItems(value) for value in node))
+        return set()
+
+    def splitPresent(self, kind, nodes, seen):
+        # the distinct items among the nodes that only have to be present, and the other nodes with the names
+        # seen on the way to them. An all inside an all and an any (or a count of at least one) inside an any are
+        # flattened into their parent
+        itemIds, others = [], []
+        for child in nodes:
+            node, childSeen = self.resolve(child, seen)
+            if kind == "any" and isinstance(node, dict) and set(node) <= {"count", "atLeast"} and node.get("atLeast", 1) == 1 and "count" in node:
+                node = {"any": node["count"]}
+            if kind != "count" and isinstance(node, dict) and list(node) == [kind]:
+                childItems, childOthers = self.splitPresent(kind, node[kind], childSeen)
+                itemIds += [itemId for itemId in childItems if itemId not in itemIds]
+                others += childOthers
+            elif "item" in node and "exactly" not in node and node.get("atLeast", 1) == 1 and int(node["item"]) not in itemIds:
+                itemIds.append(int(node["item"]))
+            else:
+                others.append((node, childSeen))
+        return itemIds, others
+
+    def buildParts(self, kind, nodes, seen):
+        # predicates for the nodes of an all, any or count, with one mask test for the items that only have to be present
+        itemIds, others = self.splitPresent(kind, nodes, seen)
+        if len(itemIds) == 1:
+            # a single item is checked quicker with `in`
+            others.insert(0, ({"item": itemIds[0]}, seen))
+        predicates = [maskTest(itemIds, kind)] if len(itemIds) > 1 else []
+        return predicates + [self.build(node, childSeen) for node, childSeen in others]
+
+    def build(self, node, seen=()):
+        node, seen = self.resolve(node, seen)
+        if "item" in node:
+            itemId = int(node["item"])
+            if "exactly" in node:
+                exactly = int(node["exactly"])
+                return lambda inventory: inventory.count(itemId) == exactly
+            if node.get("atLeast", 1) == 1:
+                return lambda inventory: itemId in inventory
+            atLeast = int(node["atLeast"])
+            return lambda inventory: inventory.count(itemId) >= atLeast
+        if "all" in node or "any" in node:
+            kind = "all" if "all" in node else "any"
+            predicates = self.buildParts(kind, node[kind], seen)
+            return allOf(predicates) if kind == "all" else anyOf(predicates)
+        if "not" in node:
+            predicate = self.build(node["not"], seen)
+            return lambda inventory: not predicate(inventory)
+        if "count" in node:
+            kind = "exactly" if "exactly" in node else "atLeast"
+            target = int(node.get(kind, 1))
+            itemIds, others = self.splitPresent("count", node["count"], seen)
+            if len(itemIds) > 1 and not others:
+                return maskTest(itemIds, kind, target)
+            count = sumOf(self.buildParts("count", node["count"], seen))
+            if kind == "exactly":
+                return lambda inventory: count(inventory) == target
+            return lambda inventory: count(inventory) >= target
+        raise ValueError("Unknown logic rule node {}".format(node))
+
+    def compile(self, node):
+        key = json.dumps(node, sort_keys=True)
+        if key not in self._compiled:
+            dependencies = frozenset(self.collectItems(self.expand(node)))
+            self._compiled[key] = CompiledRule(self.build(node), dependencies)
+        return self._compiled[key]
+
+    def expand(self, node, seen=()):
+        # the tree with every named rule replaced by its definition
+        node, seen = self.resolve(node, seen)
+        if isinstance(node, dict):
+            return {key: self.expand(value, seen) for key, value in node.items()}
+        if isinstance(node, list):
+            return [self.expand(value, seen) for value in node]
+        return node
+
+    def getRuleset(self, mode, nightmare=False):
+        # rules per location kind, the first entry for a location wins
+        ruleMode = "Reverse" if mode == "Reverse" else "Regular"
+        treasures = {}
+        for entry in self.document["treasures"][ruleMode]:
+            for locationId in entry["locations"]:
+                treasures.setdefault(locationId, self.compile(entry["requires"]))
+        bonuses = {}
+        for entry in self.document["bonuses"][ruleMode]:
+            for locationId in entry["locations"]:
+                bonuses.setdefault(locationId, self.compile(entry["requires"]))
+        forms = {}
+        for entry in self.document["forms"]["Nightmare" if nightmare else "Regular"]:
+            forms.setdefault((entry["form"], entry["level"]), self.compile(entry["requires"]))
+        puzzles = {}
+        for entry in self.document["puzzles"]:
+            for puzzleId in entry["locations"]:
+                puzzles.setdefault(puzzleId, self.compile(entry["requires"]))
+        return treasures, bonuses, forms, puzzles
+
+
+def getDependents(tables):
+    # item id -> the (kind, location) pairs whose rule looks at that item
+    dependents = {}
+    for kind, table in tables.items():
+        for location, rule in table.items():
+            for itemId in rule.dependencies:
+                dependents.setdefault(itemId, []).append((kind, location))
+    return dependents
+
+
+compilerCache = {}
+
+def getRuleCompiler(path=rulesPath):
+    if path not in compilerCache:
+        with open(path) as rulesFile:
+            compilerCache[path] = LogicRuleCompiler(json.load(rulesFile))
+    return compilerCache[path]
+
+
+if __name__ == "__main__":
+    # prints which locations each item unlocks for every rule set
+    for mode, nightmare in [("Regular", False), ("Reverse", False), ("Regular", True)]:
+        treasures, bonuses, forms, puzzles = getRuleCompiler().getRuleset(mode, nightmare)
+        dependents = getDependents({"treasure": treasures, "bonus": bonuses, "form": forms, "puzzle": puzzles})
+        print("{}{}".format(mode, " Nightmare" if nightmare else ""))
+        for itemId in sorted(dependents):
+            print("  {}: {}".format(itemId, ", ".join("{} {}".format(kind, location) for kind, location in dependents[itemId])))
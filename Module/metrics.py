@@ -0,0 +1,104 @@
+import bisect, threading, time
+from contextlib import contextmanager
+
+# Minimal Prometheus text format metrics, values are kept per process and exposed on /metrics.
+
+defaultBuckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+registry = []
+
+
+def formatLabels(labelNames, labelValues, extra=()):
+    pairs = list(zip(labelNames, labelValues)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join('{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"')) for name, value in pairs) + "}"
+
+
+def formatValue(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class Counter:
+    def __init__(self, name, documentation, labelNames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelNames = tuple(labelNames)
+        self._values = {}
+        self._lock = threading.Lock()
+        registry.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[name] for name in self.labelNames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels):
+        return self._values.get(tuple(labels[name] for name in self.labelNames), 0)
+
+    def total(self):
+        with self._lock:
+            return sum(self._values.values())
+
+    def render(self):
+        lines = ["# HELP {} {}".format(self.name, self.documentation), "# TYPE {} counter".format(self.name)]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append("{}{} {}".format(self.name, formatLabels(self.labelNames, key), formatValue(value)))
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelNames=(), buckets=defaultBuckets):
+        self.name = name
+        self.documentation = documentation
+        self.labelNames = tuple(labelNames)
+        self.buckets = tuple(buckets)
+        # per label set: count per bucket (the last one is +Inf), sum of the observations
+        self._values = {}
+        self._lock = threading.Lock()
+        registry.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.labelNames)
+        with self._lock:
+            if key not in self._values:
+                self._values[key] = [[0]*(len(self.buckets)+1), 0.0]
+            bucketCounts, total = self._values[key]
+            bucketCounts[bisect.bisect_left(self.buckets, value)] += 1
+            self._values[key][1] = total + value
+
+    def render(self):
+        lines = ["# HELP {} {}".format(self.name, self.documentation), "# TYPE {} histogram".format(self.name)]
+        with self._lock:
+            for key, (bucketCounts, total) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), bucketCounts):
+                    cumulative += count
+                    lines.append("{}_bucket{} {}".format(self.name, formatLabels(self.labelNames, key, [("le", formatValue(bound))]), cumulative))
+                lines.append("{}_sum{} {}".format(self.name, formatLabels(self.labelNames, key), formatValue(total)))
+                lines.append("{}_count{} {}".format(self.name, formatLabels(self.labelNames, key), cumulative))
+        return lines
+
+
+def render():
+    lines = []
+    for metric in registry:
+        lines += metric.render()
+    return "\n".join(lines) + "\n"
+
+
+stageDuration = Histogram("kh2rando_stage_duration_seconds", "Time spent in each stage of seed generation.", ["stage"])
+seedRetries = Counter("kh2rando_seed_retries_total", "Seed names rejected during generation, by reason.", ["reason"])
+seedsServed = Counter("kh2rando_seeds_served_total", "Seeds handed out, by whether they came from the cache.", ["source"])
+
+
+@contextmanager
+def span(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stageDuration.observe(time.perf_counter() - start, stage=stage)
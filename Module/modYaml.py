@@ -0,0 +1,177 @@
+import contextlib, re, threading
+import yaml
+
+from Class.modYml import modYml
+
+# Writes the yml files of the mod the same way yaml.dump(data, line_break="\r\n") did, byte for byte.
+# The list patches are nothing but mappings and lists of numbers and plain words, those are written
+# directly. Anything else goes to LibYAML when it is there, and to the python emitter when the data
+# holds types only the full Dumper knows.
+
+# words the yaml resolver would read back as something other than a string, those have to be quoted
+reservedWords = {"yes", "Yes", "YES", "no", "No", "NO", "true", "True", "TRUE", "false", "False", "FALSE",
+                 "on", "On", "ON", "off", "Off", "OFF", "null", "Null", "NULL"}
+plainWord = re.compile(r"[A-Za-z][A-Za-z0-9_]*\Z")
+
+
+class UnsupportedValue(Exception):
+    pass
+
+
+class TaglessDumper(yaml.Dumper):
+    # the mod loader doesn't read python tags, tuples and the like are written like the lists they hold
+    def process_tag(self):
+        pass
+
+
+emitterLock = threading.Lock()
+
+
+@contextlib.contextmanager
+def taglessEmitter():
+    # khbr writes its own yml into the zip with the stock yaml.dump, the emitter leaves out the tags
+    # there too while it runs and is put back afterwards
+    with emitterLock:
+        process_tag = yaml.emitter.Emitter.process_tag
+        yaml.emitter.Emitter.process_tag = TaglessDumper.process_tag
+        try:
+            yield
+        finally:
+            yaml.emitter.Emitter.process_tag = process_tag
+
+
+fastDumper = yaml.CSafeDumper if getattr(yaml, "__with_libyaml__", False) else None
+
+
+def scalar(value):
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    if type(value) is int:
+        return str(value)
+    if type(value) is str and plainWord.match(value) and value not in reservedWords:
+        return value
+    raise UnsupportedValue(value)
+
+
+def visit(node, seen):
+    # yaml.dump writes a list or mapping that appears twice as an anchor and an alias, those are left to it
+    if id(node) in seen:
+        raise UnsupportedValue(node)
+    seen.add(id(node))
+
+
+def writeMapping(mapping, indent, lines, seen):
+    visit(mapping, seen)
+    keys = list(mapping)
+    # yaml.dump sorts the keys, mixed types are left to it
+    if not (all(type(key) is int for key in keys) or all(type(key) is str for key in keys)):
+        raise UnsupportedValue(keys)
+    for key in sorted(keys):
+        value = mapping[key]
+        prefix = " " * indent + scalar(key) + ":"
+        if type(value) is dict and value:
+            lines.append(prefix)
+            writeMapping(value, indent + 2, lines, seen)
+        elif type(value) is list and value:
+            # sequences in a mapping aren't indented any further than their key
+            lines.append(prefix)
+            writeSequence(value, indent, lines, seen)
+        else:
+            lines.append(prefix + " " + writeEmpty(value, seen))
+
+
+def writeSequence(sequence, indent, lines, seen):
+    visit(sequence, seen)
+    for value in sequence:
+        if (type(value) is dict or type(value) is list) and value:
+            first = len(lines)
+            if type(value) is dict:
+                writeMapping(value, indent + 2, lines, seen)
+            else:
+                writeSequence(value, indent + 2, lines, seen)
+            # the first entry of a nested block goes on the line of its dash
+            lines[first] = " " * indent + "- " + lines[first][indent + 2:]
+        else:
+            lines.append(" " * indent + "- " + writeEmpty(value, seen))
+
+
+def writeEmpty(value, seen):
+    if type(value) is dict:
+        visit(value, seen)
+        return "{}"
+    if type(value) is list:
+        visit(value, seen)
+        return "[]"
+    return scalar(value)
+
+
+def writePlain(data, lineBreak):
+    lines = []
+    seen = set()
+    if type(data) is dict and data:
+        writeMapping(data, 0, lines, seen)
+    elif type(data) is list and data:
+        writeSequence(data, 0, lines, seen)
+    else:
+        raise UnsupportedValue(data)
+    return lineBreak.join(lines) + lineBreak
+
+
+def libyamlSafe(data):
+    # LibYAML lays out a few things differently from the python emitter: documents that are a single scalar,
+    # empty keys and keys too long for a simple key, which the python emitter writes as "? key", and long
+    # strings with characters it escapes, which it folds at other places
+    if type(data) is dict:
+        return all(type(key) in (int, str) and 0 < len(str(key)) <= 64 and libyamlSafe(key) and libyamlSafe(value) for key, value in data.items())
+    if type(data) is list:
+        return all(libyamlSafe(value) for value in data)
+    if type(data) is str:
+        return data.isascii()
+    return True
+
+
+def dumpYaml(data, lineBreak="\r\n"):
+    try:
+        return writePlain(data, lineBreak)
+    except UnsupportedValue:
+        pass
+    if fastDumper is not None and type(data) in (dict, list) and libyamlSafe(data):
+        try:
+            return yaml.dump(data, Dumper=fastDumper, line_break=lineBreak)
+        except yaml.representer.RepresenterError:
+            pass
+    return yaml.dump(data, Dumper=TaglessDumper, line_break=lineBreak)
+
+
+def containerIds(node, ids):
+    if type(node) is dict:
+        ids.append(id(node))
+        for value in node.values():
+            containerIds(value, ids)
+    elif type(node) in (list, tuple):
+        ids.append(id(node))
+        for value in node:
+            containerIds(value, ids)
+    return ids
+
+
+# the assets every mod.yml starts with, written once, a seed only writes the assets it adds and its title
+defaultAssets = modYml.getDefaultMod()["assets"]
+defaultAssetsYaml = {"\r\n": dumpYaml(defaultAssets, "\r\n")}
+
+
+def dumpMod(mod, lineBreak="\r\n"):
+    assets = mod.get("assets")
+    if set(mod) != {"assets", "title"} or type(assets) is not list or assets[:len(defaultAssets)] != defaultAssets:
+        return dumpYaml(mod, lineBreak)
+    added = assets[len(defaultAssets):]
+    # an object in both parts would have been written as an alias of the first one
+    defaultIds = containerIds(assets[:len(defaultAssets)], [])
+    if len(set(defaultIds)) != len(defaultIds) or set(defaultIds).intersection(containerIds(added, [])):
+        return dumpYaml(mod, lineBreak)
+    if lineBreak not in defaultAssetsYaml:
+        defaultAssetsYaml[lineBreak] = dumpYaml(defaultAssets, lineBreak)
+    # the keys are sorted, so the assets come before the title
+    return "assets:" + lineBreak + defaultAssetsYaml[lineBreak] + (dumpYaml(added, lineBreak) if added else "") + dumpYaml({"title": mod["title"]}, lineBreak)
@@ -38,17 +38,21 @@ class SeedModifier():
             {
                 "name": "Remove Damage Cap",
                 "description": "Removes the damage cap for every enemy/boss in the game."
+            },
+            {
+                "name": "Logic Aware Placement",
+                "description": "Magic, proofs, pages, forms, summons and growths are placed where they can be reached, so far fewer seeds need to be rerolled"
             }
         ]
 
-    def randomAbilityPool(action, support):
+    def randomAbilityPool(action, support, rng=random):
         abilitylist = action + support
         abilitydict = {i.Name: i for i in abilitylist}
         possibleabilities = list(set([i.Name for i in abilitylist if i.Name not in ["Second Chance", "Once More"]]))
         possibleabilities.sort()
         randomabilitypool = []
         for _ in range(len(abilitylist)-2):
-            choice = random.choice(possibleabilities)
+            choice = rng.choice(possibleabilities)
             randomabilitypool.append(abilitydict[choice])
             # Limit only 1 of each action ability in the pool, to make it more interesting
             if choice in [i.Name for i in action]:
@@ -0,0 +1,20 @@
+import datetime, hashlib, threading
+from collections import namedtuple
+
+CachedPage = namedtuple("CachedPage", ["html", "etag", "lastModified"])
+
+
+class DailyPageCache:
+    # keeps the rendered page of the current day, the page only changes when the daily modifiers do
+    def __init__(self):
+        self._date = None
+        self._page = None
+        self._lock = threading.Lock()
+
+    def get(self, date, render):
+        with self._lock:
+            if self._date != date:
+                html = render(date)
+                self._page = CachedPage(html, hashlib.sha1(html.encode("utf-8")).hexdigest(), datetime.datetime.now(datetime.timezone.utc).replace(microsecond=0))
+                self._date = date
+            return self._page
@@ -0,0 +1,86 @@
+import copy, json, threading, time, zlib
+from collections import OrderedDict
+
+from Module.metrics import Counter, Histogram
+
+# first byte of every stored blob, bump it when the layout of the blob changes
+permalinkVersion = 1
+
+permalinkBytes = Histogram("kh2rando_permalink_bytes", "Size of stored permalink blobs.", buckets=(256, 512, 1024, 2048, 4096, 8192))
+permalinkLoads = Counter("kh2rando_permalink_loads_total", "Permalink lookups, by where the settings were found.", ["source"])
+
+
+def encodeSettings(settings):
+    return bytes([permalinkVersion]) + zlib.compress(json.dumps(settings, separators=(",", ":")).encode("utf-8"))
+
+
+def decodeSettings(blob):
+    if blob[0] != permalinkVersion:
+        raise ValueError("Unknown permalink version {}".format(blob[0]))
+    return json.loads(zlib.decompress(blob[1:]).decode("utf-8"))
+
+
+class PermalinkStore:
+    def __init__(self, redisClient, ttl=None, cacheSize=256, clock=time.monotonic):
+        self.redisClient = redisClient
+        self.ttl = ttl
+        self.cacheSize = cacheSize
+        self.clock = clock
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def getRedisKey(self, permaLink):
+        return "permalink:" + permaLink
+
+    def save(self, permaLink, settings):
+        settings = json.loads(json.dumps(settings))
+        if self.redisClient is not None:
+            blob = encodeSettings(settings)
+            permalinkBytes.observe(len(blob))
+            self.redisClient.set(self.getRedisKey(permaLink), blob, ex=self.ttl)
+        self.remember(permaLink, settings, self.ttl)
+
+    def load(self, permaLink):
+        # returns a copy of the stored settings, or None for an unknown permalink
+        with self._lock:
+            if permaLink in self._cache:
+                settings, expires = self._cache[permaLink]
+                if expires is None or self.clock() < expires:
+                    self._cache.move_to_end(permaLink)
+                    permalinkLoads.inc(source="memory")
+                    return copy.deepcopy(settings)
+                # gone from redis as well, every worker has to agree that the link expired
+                del self._cache[permaLink]
+        if self.redisClient is None:
+            permalinkLoads.inc(source="missing")
+            return None
+        key = self.getRedisKey(permaLink)
+        blob = self.redisClient.get(key)
+        if blob is not None:
+            settings = decodeSettings(blob)
+            permalinkLoads.inc(source="redis")
+        else:
+            # permalinks made before the blob format are hashes with one json value per session key
+            fields = self.redisClient.hgetall(permaLink)
+            if not fields:
+                permalinkLoads.inc(source="missing")
+                return None
+            settings = {str(field, 'utf-8'): json.loads(value) for field, value in fields.items()}
+            permalinkLoads.inc(source="legacy")
+            key = permaLink
+        self.remember(permaLink, settings, self.getRemainingTtl(key))
+        return copy.deepcopy(settings)
+
+    def getRemainingTtl(self, key):
+        # kept in memory no longer than redis keeps it, keys redis keeps forever still get the store's ttl
+        if self.ttl is None:
+            return None
+        remaining = self.redisClient.ttl(key)
+        return min(remaining, self.ttl) if remaining >= 0 else self.ttl
+
+    def remember(self, permaLink, settings, ttl=None):
+        with self._lock:
+            self._cache[permaLink] = (settings, self.clock() + ttl if ttl is not None else None)
+            self._cache.move_to_end(permaLink)
+            while len(self._cache) > self.cacheSize:
+                self._cache.popitem(last=False)
@@ -0,0 +1,191 @@
+import random
+from collections import Counter
+
+from Class.locationClass import KH2Treasure, KH2Bonus, KH2FormLevel, KH2Puzzle, KH2LevelUp, KH2StartingItem
+from List.configDict import itemType, locationDepth
+from Module.seedEvaluation import Inventory, findSpheres
+
+
+class FenwickTree:
+    # prefix sums over location weights, updating one weight or finding the location for a running total is O(log n)
+    def __init__(self, values):
+        self.values = list(values)
+        self.size = len(self.values)
+        self._tree = [0] + self.values
+        for index in range(1, self.size + 1):
+            parent = index + (index & -index)
+            if parent <= self.size:
+                self._tree[parent] += self._tree[index]
+        self.total = sum(self.values)
+
+    def add(self, index, delta):
+        self.values[index] += delta
+        self.total += delta
+        index += 1
+        while index <= self.size:
+            self._tree[index] += delta
+            index += index & -index
+
+    def find(self, target):
+        # index of the location whose weight range contains target, for 0 <= target < total
+        position = 0
+        step = 1 << self.size.bit_length()
+        while step:
+            next = position + step
+            if next <= self.size and self._tree[next] <= target:
+                position = next
+                target -= self._tree[next]
+            step >>= 1
+        return position
+
+
+class PlacementPool:
+    # The open locations for Sora's items. Draws only ever consider locations the item is allowed in,
+    # which gives the same distribution as drawing from every location and rejecting the invalid ones.
+    def __init__(self, locations, reportDepth=None):
+        self.locations = list(locations)
+        self.weights = [location.LocationWeight for location in self.locations]
+        self.open = [True] * len(self.locations)
+        # with boss report depths the locations at that depth are kept for reports only
+        self.reportOnlyDepth = reportDepth if reportDepth in (locationDepth.FirstBoss, locationDepth.SecondBoss) else None
+        self._trees = {}
+
+    def isAllowed(self, location, type):
+        if type in location.InvalidChecks:
+            return False
+        if self.reportOnlyDepth is not None and type != itemType.REPORT and location.LocationDepth == self.reportOnlyDepth:
+            return False
+        return True
+
+    def getTree(self, type, weighted):
+        key = (type, weighted)
+        if key not in self._trees:
+            self._trees[key] = FenwickTree(
+                (weight if weighted else 1) if isOpen and self.isAllowed(location, type) else 0
+                for location, weight, isOpen in zip(self.locations, self.weights, self.open)
+            )
+        return self._trees[key]
+
+    def getItemTree(self, item, weighted):
+        if self.reportOnlyDepth is not None and item.ItemType == itemType.REPORT:
+            # reports are spread evenly over the locations that allow them
+            weighted = False
+        return self.getTree(item.ItemType, weighted)
+
+    def draw(self, item, weighted, rng=random):
+        tree = self.getItemTree(item, weighted)
+        if tree.total <= 0:
+            raise ValueError("No location left for {}, include more locations.".format(item.Name))
+        if isinstance(tree.total, int):
+            return tree.find(rng.randrange(tree.total))
+        return tree.find(rng.random() * tree.total)
+
+    def drawWhere(self, item, weighted, accept, rng=random):
+        # like draw, limited to the locations accept() returns True for, None when there are none
+        tree = self.getItemTree(item, weighted)
+        candidates = [index for index, value in enumerate(tree.values) if value and accept(self.locations[index])]
+        if not candidates:
+            return None
+        return rng.choices(candidates, [tree.values[index] for index in candidates])[0]
+
+    def take(self, index):
+        self.open[index] = False
+        for tree in self._trees.values():
+            if tree.values[index]:
+                tree.add(index, -tree.values[index])
+        return self.locations[index]
+
+    def getOpenLocations(self):
+        return [location for location, isOpen in zip(self.locations, self.open) if isOpen]
+
+
+def getLocationRewards(location):
+    if isinstance(location, KH2StartingItem):
+        return location.Items
+    return [location.getReward()]
+
+
+class AssumedFill:
+    # Reachability for assumed fill, using the same requirements and rewards as SeedValidator.
+    # Only logic items are tracked, nothing else can unlock a location. The rewards are read once,
+    # after that every item the fill places has to go through place().
+    def __init__(self, restrictions, allLocations, logicItemIds, startingInventory):
+        treasures, bonuses, forms, puzzles = restrictions.get_restriction_tables()
+        self.logicItemIds = set(logicItemIds)
+        self.startingInventory = [int(itemId) for itemId in startingInventory if int(itemId) in self.logicItemIds]
+        self.freeLocations = []
+        self.lockedLocations = []
+        self.rewards = {}
+        for location in allLocations:
+            if id(location) in self.rewards:
+                continue
+            if isinstance(location, KH2Treasure):
+                requirement = treasures.get(location.Id)
+            elif isinstance(location, KH2Bonus):
+                requirement = bonuses.get(location.RewardId)
+            elif isinstance(location, KH2FormLevel):
+                requirement = forms.get((location.FormId, location.FormLevel))
+            elif isinstance(location, KH2Puzzle):
+                requirement = puzzles.get(location.Id)
+            elif isinstance(location, (KH2LevelUp, KH2StartingItem)):
+                requirement = None
+            else:
+                continue
+            self.rewards[id(location)] = [itemId for itemId in getLocationRewards(location) if itemId in self.logicItemIds]
+            if requirement is None:
+                self.freeLocations.append(location)
+            else:
+                self.lockedLocations.append((location, requirement))
+        # the validator needs every restricted location except the puzzles to be reachable
+        self.requiredIds = {id(location) for location, requirement in self.lockedLocations if not isinstance(location, KH2Puzzle)}
+
+    def place(self, location, itemId):
+        # mirrors setReward, the starting items keep a list while every other location holds one reward
+        if isinstance(location, KH2StartingItem):
+            if itemId in self.logicItemIds:
+                self.rewards[id(location)].append(itemId)
+        else:
+            self.rewards[id(location)] = [itemId] if itemId in self.logicItemIds else []
+
+    def getReachable(self, assumedItemIds):
+        # ids of the locations that can be reached holding the assumed items plus everything found on the way
+        inventory = Inventory(self.startingInventory)
+        inventory += assumedItemIds
+        reachable = set()
+        for location in self.freeLocations:
+            reachable.add(id(location))
+            inventory += self.rewards[id(location)]
+        locked = [(requirement, self.rewards[id(location)], id(location)) for location, requirement in self.lockedLocations]
+        for sphere in findSpheres(inventory, locked):
+            reachable.update(sphere)
+        return reachable
+
+
+class ReachabilityTracker:
+    # Proves that a seed can't be completed while Sora's items are still being placed. Every logic item that
+    # isn't placed yet is assumed to be held, so the reachable locations only shrink as items are placed and
+    # a required location that is out of reach stays out of reach.
+    def __init__(self, fill, unplacedItemIds):
+        self.fill = fill
+        self.unplaced = Counter(itemId for itemId in unplacedItemIds if itemId in fill.logicItemIds)
+        self.remaining = sum(self.unplaced.values())
+        self.reachable = fill.getReachable(self.unplaced.elements())
+
+    def isCompletable(self):
+        return self.fill.requiredIds <= self.reachable
+
+    def place(self, location, itemId):
+        # False as soon as the seed can't be completable anymore
+        self.fill.place(location, itemId)
+        if self.unplaced[itemId] <= 0:
+            return True
+        self.unplaced[itemId] -= 1
+        self.remaining -= 1
+        # an item placed somewhere reachable can still lock locations away, its own and through it everything
+        # that needed the item. Those are only found by the full recheck, which happens here once the last
+        # logic item is placed, so an uncompletable seed is always caught then. Rechecking after every item
+        # would catch it sooner but costs more than it saves
+        if id(location) in self.reachable and self.remaining:
+            return True
+        self.reachable = self.fill.getReachable(self.unplaced.elements())
+        return self.isCompletable()
@@ -538,7 +538,7 @@ musicPaths = {
 }
 class RandomBGM():
     @staticmethod
-    def randomizeBGM(selections, platform):
+    def randomizeBGM(selections, platform, rng=random):
     
         #for testing. you would want a option to set these to whatever number you want on the site.
         #if we don't care about categories then we could just set one number and set all tracks to "unknown" or something.
@@ -575,7 +575,7 @@ class RandomBGM():
                     kind = "field"
                 #give "unknown" and "cutscene" bgm a random kind. (again we only want to populate field list if we are separating feild/battle)
                 if "Randomize Field and Battle Music Separately" in options["options"] and (category == "unknown" or category == "cutscene"):
-                    kind = random.choice(["field", "battle"])
+                    kind = rng.choice(["field", "battle"])
                 #separate dearly beloved bgms
                 if "Randomize Dearly Beloved Separately" in options["options"] and category == "title":
                     kind = "title"
@@ -598,10 +598,10 @@ class RandomBGM():
         shuffledField = BGMList["field"][:]
         shuffledTitle = BGMList["title"][:]
         shuffledScene = BGMList["cutscene"][:]
-        random.shuffle(shuffledBattle)
-        random.shuffle(shuffledField)
-        random.shuffle(shuffledTitle)
-        random.shuffle(shuffledScene)
+        rng.shuffle(shuffledBattle)
+        rng.shuffle(shuffledField)
+        rng.shuffle(shuffledTitle)
+        rng.shuffle(shuffledScene)
         numBattle = 0
         numField = 0
         numTitle = 0
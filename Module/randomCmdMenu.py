@@ -40,7 +40,7 @@ class RandomCmdMenu():
             "zz0": "Kingdom Hearts 1"
             }
 
-    def randomizeCmdMenus(cmdMenuChoice, outZip, platform="PCSX2"):
+    def randomizeCmdMenus(cmdMenuChoice, outZip, platform="PCSX2", rng=random):
         if not platform == "PCSX2":
             return ""
         cmdMenus = [
@@ -79,10 +79,10 @@ class RandomCmdMenu():
         cmdMenusDict = {}
         if cmdMenuChoice == "randAll":
             for cmdMenu in cmdMenus[:]:
-                cmdMenusDict[cmdMenu] = random.choice(cmdMenus)
+                cmdMenusDict[cmdMenu] = rng.choice(cmdMenus)
                 cmdMenus.remove(cmdMenusDict[cmdMenu])
         elif cmdMenuChoice == "rand1":
-            singleCmdMenu = random.choice(cmdMenus)
+            singleCmdMenu = rng.choice(cmdMenus)
             for cmdMenu in cmdMenus[:]:
                 cmdMenusDict[cmdMenu] = singleCmdMenu
         elif cmdMenuChoice == "vanilla":
@@ -1,11 +1,16 @@
 from dataclasses import dataclass, field
-import random, zipfile, yaml, io, json, os, base64, asyncio, struct
+import random, zipfile, io, json, os, base64, asyncio, struct, threading
 from Module.spoilerLog import generateSpoilerLog
 from Module.randomCmdMenu import RandomCmdMenu
 from Module.randomBGM import RandomBGM
 from Module.hints import Hints
 from Module.startingInventory import StartingInventory
-from Module.importantItems import getImportantChecks,getUsefulItems,getUsefulAbilities,getUsefulNightmarePassiveAbilities,getUsefulNightmareActiveAbilities,getSCOM
+from Module.metrics import span
+from Module.modYaml import dumpYaml, dumpMod, taglessEmitter
+from Module.seedArchive import SeedArchive, getStrategy
+from Module.assetStore import getTextAsset, getMember, writeMember, getPuzzleBar
+from Module.placement import PlacementPool, AssumedFill, ReachabilityTracker
+from Module.importantItems import getImportantChecks,getUsefulItems,getUsefulAbilities,getUsefulNightmarePassiveAbilities,getUsefulNightmareActiveAbilities,getSCOM,getLogicItems
 
 from Class.locationClass import KH2Location, KH2ItemStat, KH2Puzzle, KH2LevelUp, KH2FormLevel, KH2Bonus, KH2Treasure, KH2StartingItem, KH2ItemStat
 from Class.itemClass import KH2Item, ItemEncoder
@@ -16,9 +21,9 @@ from List.experienceValues import soraExp, formExp
 from List.LvupStats import Stats
 from List.LocationList import Locations
 from List.ItemList import Items
+from List.catalog import getLocationCatalog, ItemCatalog
 
-def noop(self, *args, **kw):
-    pass
+globalRandomLock = threading.Lock()
 
 
 @dataclass
@@ -44,24 +49,28 @@ class KH2Randomizer():
     _validItemListDonald: list[KH2Item] = field(default_factory=list)
 
     def __post_init__(self):
-        random.seed(self.seedName)
-        # call the random number generator with a random salt addition if a spoiler log is generated
+        # every stage draws from its own generator derived from the seed name, see getRandom
+        self._randomSeed = self.seedName
+        # salt the seed name if a spoiler log is generated
         if self.spoiler:
-            random.seed(self.seedName+str(random.random()))
+            self._randomSeed = self.seedName+str(random.Random(self.seedName).random())
+        self._randomStreams = {}
+
+    def getRandom(self, stage):
+        # stages never share a generator, so what one stage draws doesn't depend on the others or on other threads
+        if stage not in self._randomStreams:
+            self._randomStreams[stage] = random.Random("{}-{}".format(self._randomSeed, stage))
+        return self._randomStreams[stage]
 
     def populateLocations(self, excludeWorlds, maxItemLogic=False, item_difficulty="Normal",reportDepth=None):
-        self._allLocationList = Locations.getTreasureList(maxItemLogic) + Locations.getSoraLevelList() + Locations.getSoraBonusList(maxItemLogic) + Locations.getFormLevelList(maxItemLogic) + Locations.getPuzzleLocations() + Locations.getSoraWeaponList() + Locations.getSoraStartingItemList()
+        self._allLocationList, self._allLocationListGoofy, self._allLocationListDonald = getLocationCatalog(maxItemLogic).instantiate()
 
         self._validLocationList = [location for location in self._allLocationList if not set(location.LocationTypes).intersection(excludeWorlds+["Level1Form", "SummonLevel"])]
 
         self.puzzleRando = "Puzzle" not in excludeWorlds
 
-        self._allLocationListGoofy = Locations.getGoofyWeaponList() + Locations.getGoofyStartingItemList() + Locations.getGoofyBonusList()
-
         self._validLocationListGoofy = [location for location in self._allLocationListGoofy if not set(location.LocationTypes).intersection(excludeWorlds)]
 
-        self._allLocationListDonald = Locations.getDonaldWeaponList() + Locations.getDonaldStartingItemList() + Locations.getDonaldBonusList()
-
         self._validLocationListDonald = [location for location in self._allLocationListDonald if not set(location.LocationTypes).intersection(excludeWorlds)]
 
         late_item_weight = 1
@@ -136,17 +145,18 @@ class KH2Randomizer():
 
 
     def populateItems(self, promiseCharm = False, startingInventory=[], abilityListModifier=None):
-        abilityList = Items.getSupportAbilityList() + Items.getActionAbilityList()
+        abilityList = list(ItemCatalog.supportAbilityList + ItemCatalog.actionAbilityList)
         if abilityListModifier:
-            abilityList = abilityListModifier(Items.getActionAbilityList(), Items.getSupportAbilityList())
-        validItemList = Items.getItemList() + abilityList
+            abilityList = abilityListModifier(list(ItemCatalog.actionAbilityList), list(ItemCatalog.supportAbilityList), self.getRandom("items"))
+        validItemList = list(ItemCatalog.itemList) + abilityList
 
-        self._validItemListGoofy = Items.getGoofyAbilityList()
-        self._validItemListDonald = Items.getDonaldAbilityList()
+        self._validItemListGoofy = list(ItemCatalog.goofyAbilityList)
+        self._validItemListDonald = list(ItemCatalog.donaldAbilityList)
         if promiseCharm:
             validItemList.append(KH2Item(524, "PromiseCharm",itemType.PROMISE_CHARM))
 
         self._validItemList = [item for item in validItemList if not str(item.Id) in startingInventory]
+        self._startingInventory = startingInventory
 
 
     def validateCount(self):
@@ -172,43 +182,74 @@ class KH2Randomizer():
         abilityList = [item for item in self._validItemList if (item.ItemType == itemType.SUPPORT_ABILITY and "Support" in keybladeAbilities) or (item.ItemType == itemType.ACTION_ABILITY and "Action" in keybladeAbilities)]
 
         nightmareAbilityIds = getUsefulNightmareActiveAbilities() + getUsefulNightmarePassiveAbilities() + getUsefulAbilities() + getSCOM()
+        rng = self.getRandom("keyblades")
 
         for keyblade in keybladeList:
-            randomAbility = random.choice(abilityList)
+            randomAbility = rng.choice(abilityList)
             if self.nightmareSetting and randomAbility.Id not in nightmareAbilityIds:
                 for i in range(3):
-                    randomAbility = random.choice(abilityList)
+                    randomAbility = rng.choice(abilityList)
                     if randomAbility.Id in nightmareAbilityIds:
                         break
             keyblade.setReward(randomAbility.Id)
-            keyblade.setStats(keybladeMinStat, keybladeMaxStat)
+            keyblade.setStats(keybladeMinStat, keybladeMaxStat, rng)
             self._locationItems.append((keyblade,randomAbility))
             abilityList.remove(randomAbility)
             self._validItemList.remove(randomAbility)
 
         shieldList = [location for location in self._validLocationListGoofy if isinstance(location, KH2ItemStat)]
         for shield in shieldList:
-            random.shuffle(self._validItemListGoofy)
+            rng.shuffle(self._validItemListGoofy)
             randomAbility = self._validItemListGoofy.pop()
             shield.setReward(randomAbility.Id)
             self._locationItems.append((shield,randomAbility))
 
         staffList = [location for location in self._validLocationListDonald if isinstance(location, KH2ItemStat)]
         for staff in staffList:
-            random.shuffle(self._validItemListDonald)
+            rng.shuffle(self._validItemListDonald)
             randomAbility = self._validItemListDonald.pop()
             staff.setReward(randomAbility.Id)
             self._locationItems.append((staff,randomAbility))
 
-    def setRewards(self, levelChoice="ExcludeFrom50", betterJunk=False, reportDepth=None):
-        locations = [location for location in self._validLocationList if not isinstance(location, KH2ItemStat)]
-        location_weights = [location.LocationWeight for location in locations]
+    def setRewards(self, levelChoice="ExcludeFrom50", betterJunk=False, reportDepth=None, logic=None, restrictions=None):
+        # with restrictions, returns False as soon as the placed items make the seed uncompletable and stops there
+        pool = PlacementPool([location for location in self._validLocationList if not isinstance(location, KH2ItemStat)], reportDepth)
         weighted_item_list = getImportantChecks() + getUsefulItems()
         nightmareAbilityIds = getUsefulNightmareActiveAbilities() + getUsefulNightmarePassiveAbilities() + getUsefulAbilities() + getSCOM()
 
         if self.nightmareSetting:
             weighted_item_list += getUsefulNightmareActiveAbilities()
-        for item in self._validItemList:
+        rng = self.getRandom("rewards")
+
+        itemList = self._validItemList
+        logicItemIds = getLogicItems()
+        tracker = None
+        if restrictions is not None:
+            tracker = ReachabilityTracker(AssumedFill(restrictions, self._allLocationList, logicItemIds, self._startingInventory), [item.Id for item in itemList])
+            if not tracker.isCompletable():
+                return False
+        if logic is not None:
+            # assumed fill: every logic item goes somewhere reachable with the logic items that are still unplaced,
+            # which makes the seed completable without rerolling
+            fill = AssumedFill(logic, self._allLocationList, logicItemIds, self._startingInventory)
+            unplaced = [item for item in itemList if item.Id in logicItemIds]
+            rng.shuffle(unplaced)
+            while unplaced:
+                item = unplaced.pop()
+                reachable = fill.getReachable(unplacedItem.Id for unplacedItem in unplaced)
+                locationIndex = pool.drawWhere(item, item.Id in weighted_item_list, lambda location: id(location) in reachable, rng)
+                if locationIndex is None:
+                    # nothing reachable left for it, the validator will reject the seed
+                    locationIndex = pool.draw(item, item.Id in weighted_item_list, rng)
+                randomLocation = pool.take(locationIndex)
+                randomLocation.setReward(item.Id)
+                fill.place(randomLocation, item.Id)
+                self._locationItems.append((randomLocation,item))
+                if tracker and not tracker.place(randomLocation, item.Id):
+                    return False
+            itemList = [item for item in itemList if not item.Id in logicItemIds]
+
+        for item in itemList:
             weighted_item = False
             if item.Id in weighted_item_list:
                 weighted_item = True
@@ -220,32 +261,19 @@ class KH2Randomizer():
                 if matching_keyblade.getReward() in nightmareAbilityIds:
                     weighted_item = True
 
-            while True:
-                if (reportDepth==locationDepth.FirstBoss or reportDepth==locationDepth.SecondBoss) and item.ItemType == itemType.REPORT:
-                    validReportLocations = [loc for loc in locations if itemType.REPORT not in loc.InvalidChecks]
-                    randomLocation = random.choice(validReportLocations)
-                elif weighted_item:
-                    randomLocation = random.choices(locations,location_weights)[0]
-                else:
-                    randomLocation = random.choice(locations)
-
-                # if we have a restricted report setting, and we are trying to assign a restricted location with a non-report, try again
-                if (reportDepth==locationDepth.FirstBoss or reportDepth==locationDepth.SecondBoss) and randomLocation.LocationDepth==reportDepth and item.ItemType != itemType.REPORT:
-                    continue
+            randomLocation = pool.take(pool.draw(item, weighted_item, rng))
+            randomLocation.setReward(item.Id)
+            self._locationItems.append((randomLocation,item))
+            if tracker and not tracker.place(randomLocation, item.Id):
+                return False
 
-                if not item.ItemType in randomLocation.InvalidChecks:
-                    randomLocation.setReward(item.Id)
-                    location_index = locations.index(randomLocation)
-                    locations.remove(randomLocation)
-                    del location_weights[location_index]
-                    self._locationItems.append((randomLocation,item))
-                    break
-        
-        junkLocations = locations + [location for location in self._allLocationList if (not location in self._validLocationList and not set(location.LocationTypes).intersection([levelChoice]) and not set(location.InvalidChecks).intersection([itemType.JUNK]))]
+        # identity rather than equality, comparing the location dataclasses field by field is slow
+        validLocationIds = {id(location) for location in self._validLocationList}
+        junkLocations = pool.getOpenLocations() + [location for location in self._allLocationList if (not id(location) in validLocationIds and not set(location.LocationTypes).intersection([levelChoice]) and not set(location.InvalidChecks).intersection([itemType.JUNK]))]
 
 
         for location in junkLocations:
-            randomJunk = random.choice(Items.getJunkList(betterJunk))
+            randomJunk = rng.choice(ItemCatalog.getJunkList(betterJunk))
             location.setReward(randomJunk.Id)
             self._locationItems.append((location, randomJunk))
 
@@ -253,7 +281,7 @@ class KH2Randomizer():
         for item in self._validItemListGoofy:
             if len(goofyLocations) == 0:
                 break
-            randomLocation = random.choice(goofyLocations)
+            randomLocation = rng.choice(goofyLocations)
             randomLocation.setReward(item.Id)
             if not randomLocation.DoubleReward:
                 self._validLocationListGoofy.remove(randomLocation)
@@ -268,7 +296,7 @@ class KH2Randomizer():
         for item in self._validItemListDonald:
             if len(donaldLocations) == 0:
                 break
-            randomLocation = random.choice(donaldLocations)
+            randomLocation = rng.choice(donaldLocations)
             randomLocation.setReward(item.Id)
             if not randomLocation.DoubleReward:
                 self._validLocationListDonald.remove(randomLocation)
@@ -278,21 +306,22 @@ class KH2Randomizer():
                 self._validLocationListDonald.remove(randomLocation)
                 donaldLocations.remove(randomLocation)
                 continue            
-            
+        return True
 
     def setLevels(self, soraExpMult, formExpMult, statsList = None):
         if statsList == None:
             statsList = [{"Stat":"Str","Value": 2},{"Stat":"Mag", "Value": 2},{"Stat": "Def", "Value": 1},{"Stat": "Ap", "Value": 2}]
         soraLevels = [location for location in self._allLocationList if isinstance(location, KH2LevelUp)]
+        rng = self.getRandom("levels")
         for index, level in enumerate(soraLevels):
-            statChoice = random.choice(statsList)
+            statChoice = rng.choice(statsList)
             level.Exp = round(soraExp[level.Level] / soraExpMult)
             if level.Level > 1:
                 level.setStat(soraLevels[index-1], statChoice["Stat"], statChoice["Value"])
                 if level.getReward() == 0:
                     statChoice2 = statChoice
                     while (statChoice2 == statChoice):
-                        statChoice2 = random.choice(statsList)
+                        statChoice2 = rng.choice(statsList)
                     level.setStat2(statChoice2["Stat"],statChoice2["Value"])
 
 
@@ -304,19 +333,22 @@ class KH2Randomizer():
     def setBonusStats(self):
         statsList = Stats.getBonusStats()
         locations = [location for location in self._allLocationList if isinstance(location, KH2Bonus) and location.HasStat]
+        rng = self.getRandom("bonusStats")
         for location in locations:
-            random.shuffle(statsList)
+            rng.shuffle(statsList)
             first_stat = statsList.pop()
             location.setStat(first_stat)
             if location.DoubleReward:
                 while statsList[0]==first_stat:
-                    random.shuffle(statsList)
+                    rng.shuffle(statsList)
                 location.setStat(statsList.pop())
 
     def setNoAP(self, settrue=False):
         self._noap = settrue
 
-    def generateZip(self, enemyOptions={"boss":"Disabled"}, spoilerLog = False, cmdMenuChoice = "vanilla", randomBGM = False, hintsText = None, startingInventory=[], platform="PCSX2"):
+    def generateZip(self, enemyOptions={"boss":"Disabled"}, spoilerLog = False, cmdMenuChoice = "vanilla", randomBGM = False, hintsText = None, startingInventory=[], platform="PCSX2", progress=None, outFile=None, compression="stored"):
+        if progress:
+            progress("zipping")
         trsrList = [location for location in self._allLocationList if isinstance(location, KH2Treasure)]
         lvupList = [location for location in self._allLocationList if isinstance(location, KH2LevelUp)]
         bonsList = [location for location in self._allLocationList if isinstance(location, KH2Bonus)] + [location for location in self._allLocationListDonald if isinstance(location, KH2Bonus)] + [location for location in self._allLocationListGoofy if isinstance(location, KH2Bonus)]
@@ -438,32 +470,22 @@ class KH2Randomizer():
 
         
 
-        data = io.BytesIO()
-        with zipfile.ZipFile(data, "w") as outZip:
-            yaml.emitter.Emitter.process_tag = noop
-
+        # with an outFile every member is written to it as soon as it is ready, only the central directory
+        # is kept until the end, so the archive is never held in memory as a whole
+        data = io.BytesIO() if outFile is None else outFile
+        with SeedArchive(data, getStrategy(compression)) as outZip:
             if self.puzzleRando:
                 mod["assets"] += [modYml.getPuzzleMod()]
-                with open("static/jiminy.bar","rb") as puzzleBar:
-                    binaryContent = bytearray(puzzleBar.read())
-                    for puzz in puzzleList:
-                        byte0, byte1, item = puzz.getItemBytesAndLocs()
-                        # for byte1, find the most significant bits from the item Id
-                        itemByte1 = item>>8
-                        # for byte0, isolate the least significant bits from the item Id
-                        itemByte0 = item & 0x00FF
-                        binaryContent[byte0] = itemByte0
-                        binaryContent[byte1] = itemByte1
-                    outZip.writestr("modified_jiminy.bar",binaryContent)
-
-            outZip.writestr("TrsrList.yml", yaml.dump(formattedTrsr, line_break="\r\n"))
-            outZip.writestr("BonsList.yml", yaml.dump(formattedBons, line_break="\r\n"))
-            outZip.writestr("LvupList.yml", yaml.dump(formattedLvup, line_break="\r\n"))
-            outZip.writestr("FmlvList.yml", yaml.dump(formattedFmlv, line_break="\r\n"))
-            outZip.writestr("ItemList.yml", yaml.dump(formattedItem, line_break="\r\n"))
-            outZip.writestr("PlrpList.yml", yaml.dump(formattedPlrp, line_break="\r\n"))
-            outZip.writestr("sys.yml", yaml.dump(sys, line_break="\r\n"))
-            outZip.writestr("jm.yml", yaml.dump(modYml.getJMYAML(), line_break="\r\n"))
+                outZip.writestr("modified_jiminy.bar", getPuzzleBar(tuple(puzz.getItemBytesAndLocs() for puzz in puzzleList)))
+
+            outZip.writestr("TrsrList.yml", dumpYaml(formattedTrsr))
+            outZip.writestr("BonsList.yml", dumpYaml(formattedBons))
+            outZip.writestr("LvupList.yml", dumpYaml(formattedLvup))
+            outZip.writestr("FmlvList.yml", dumpYaml(formattedFmlv))
+            outZip.writestr("ItemList.yml", dumpYaml(formattedItem))
+            outZip.writestr("PlrpList.yml", dumpYaml(formattedPlrp))
+            outZip.writestr("sys.yml", dumpYaml(sys))
+            outZip.writestr("jm.yml", dumpYaml(modYml.getJMYAML()))
 
             if hintsText is not None:
                 Hints.writeHints(hintsText, self.seedName, outZip)
@@ -475,52 +497,31 @@ class KH2Randomizer():
                 else:
                     enemyOptions["memory_expansion"] = False
                 if enemyOptions.get("boss", False) or enemyOptions.get("enemy", False) or enemyOptions.get("remove_damage_cap", False):
+                    if progress:
+                        progress("enemies")
                     from khbr.randomizer import Randomizer as khbr
-                    enemySpoilers = khbr().generateToZip("kh2", enemyOptions, mod, outZip)
+                    # khbr draws from the global generator, seed it from this seed and keep other threads out meanwhile.
+                    # Its yml is written without python tags, like it was when the emitter was patched for the whole process
+                    with span("khbr"), globalRandomLock, taglessEmitter():
+                        random.seed(self.getRandom("enemies").random())
+                        enemySpoilers = khbr().generateToZip("kh2", enemyOptions, mod, outZip)
 
             if spoilerLog:
                 mod["title"] += " {seedName}".format(seedName = self.seedName)
-                with open("static/spoilerlog.html") as spoiler_site:
-                    html_template = spoiler_site.read().replace("SPOILER_JSON_FROM_SEED",json.dumps(generateSpoilerLog(self._locationItems), indent=4, cls=ItemEncoder))
-                    outZip.writestr("spoilerlog.html",html_template)
+                html_template = getTextAsset("static/spoilerlog.html").replace("SPOILER_JSON_FROM_SEED",json.dumps(generateSpoilerLog(self._locationItems), indent=4, cls=ItemEncoder))
+                outZip.writestr("spoilerlog.html",html_template)
                 if enemySpoilers:
                     outZip.writestr("enemyspoilers.txt", enemySpoilers)
 
-            mod["assets"] += RandomCmdMenu.randomizeCmdMenus(cmdMenuChoice, outZip, platform)
+            mod["assets"] += RandomCmdMenu.randomizeCmdMenus(cmdMenuChoice, outZip, platform, self.getRandom("cmdMenus"))
             
-            mod["assets"] += RandomBGM.randomizeBGM(randomBGM, platform)
+            mod["assets"] += RandomBGM.randomizeBGM(randomBGM, platform, self.getRandom("bgm"))
 
-            outZip.write("Module/icon.png", "icon.png")
+            writeMember(outZip, getMember("Module/icon.png", "icon.png"))
 
 
-            outZip.writestr("mod.yml", yaml.dump(mod, line_break="\r\n"))
+            outZip.writestr("mod.yml", dumpMod(mod))
             outZip.close()
-        data.seek(0)
+        if outFile is None:
+            data.seek(0)
         return data
-
-
-        
-
-        
-
-
-
-
-
-
-
-
-
-
-    
-if __name__ == '__main__':
-    randomizer = KH2Randomizer()
-    randomizer.populateLocations([locationType.LoD, "ExcludeFrom50"])
-    randomizer.populateItems()
-    if randomizer.validateCount():
-        randomizer.setKeybladeAbilities()
-        randomizer.setRewards()
-        randomizer.setLevels(soraExpMult = 1.5, formExpMult = {1:6, 2:3, 3:3, 4:3, 5:3})
-        randomizer.setBonusStats()
-        zip = randomizer.generateZip(hintsType="JSmartee").getbuffer()
-        open("randoSeed.zip", "wb").write(zip)
\ No newline at end of file
@@ -0,0 +1,139 @@
+import os, threading, time, zipfile, zlib
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+# How the members of a seed zip are compressed. level None stores everything like zipfile's default,
+# otherwise compressible members are deflated at that level and the ones of at least parallelBytes are
+# deflated on worker threads, zlib lets go of the GIL while it works.
+CompressionStrategy = namedtuple("CompressionStrategy", "name level parallelBytes")
+
+compressionStrategies = {
+    "stored": CompressionStrategy("stored", None, None),
+    "fast": CompressionStrategy("fast", 1, 256 * 1024),
+    "small": CompressionStrategy("small", 9, 64 * 1024),
+}
+
+# formats that are compressed already, deflating them again costs time and saves nothing
+compressedExtensions = {".png", ".jpg", ".zip", ".gz", ".scd", ".bgm"}
+# below this deflate's headers eat what it saves
+minimumDeflateBytes = 256
+# a member is stored when a deflated sample of it doesn't get below this share of its size
+maximumRatio = 0.9
+sampleBytes = 16 * 1024
+# deflated members waiting for their threads are written out once they hold this much
+maximumPendingBytes = 32 * 1024 * 1024
+
+executorLock = threading.Lock()
+executors = {}
+
+
+def getStrategy(name):
+    if name not in compressionStrategies:
+        raise ValueError("Unknown zip compression {}, choose one of {}".format(name, ", ".join(compressionStrategies)))
+    return compressionStrategies[name]
+
+
+def getExecutor():
+    with executorLock:
+        if "compression" not in executors:
+            executors["compression"] = ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1), thread_name_prefix="zip-compression")
+        return executors["compression"]
+
+
+def deflate(data, level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush()
+
+
+def isCompressible(name, data):
+    if os.path.splitext(name)[1].lower() in compressedExtensions or len(data) < minimumDeflateBytes:
+        return False
+    sample = memoryview(data)[:sampleBytes] if not isinstance(data, str) else data[:sampleBytes]
+    return len(deflate(sample, 1)) < len(sample) * maximumRatio
+
+
+def compressMember(info, data, level):
+    # runs on the worker threads, returns the info with CRC and sizes set and the bytes that go into the zip
+    info.CRC = zlib.crc32(data)
+    info.file_size = len(data)
+    payload = deflate(data, level) if info.compress_type == zipfile.ZIP_DEFLATED else data
+    info.compress_size = len(payload)
+    return info, payload
+
+
+class SeedArchive(zipfile.ZipFile):
+    # A ZipFile that picks the compression of every member written with writestr by its strategy. Members
+    # are written in the order they were given, big ones only wait for their thread when something has to
+    # come after them or too much is waiting.
+    def __init__(self, file, strategy=compressionStrategies["stored"]):
+        self.strategy = strategy
+        self._pending = []
+        self._pendingBytes = 0
+        super().__init__(file, "w")
+
+    def writestr(self, zinfo_or_arcname, data, compress_type=None, compresslevel=None):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        if isinstance(zinfo_or_arcname, zipfile.ZipInfo):
+            info = zinfo_or_arcname
+            # like zipfile, the argument overrides the compression of the info and members without
+            # permissions get rw for the owner
+            if compress_type is not None:
+                info.compress_type = compress_type
+            if not info.external_attr:
+                info.external_attr = 0o600 << 16
+        elif zinfo_or_arcname.endswith("/"):
+            info = None
+        else:
+            info = zipfile.ZipInfo(filename=zinfo_or_arcname, date_time=time.localtime(time.time())[:6])
+            info.external_attr = 0o600 << 16
+            if compress_type is None and self.strategy.level is not None and isCompressible(info.filename, data):
+                compress_type = zipfile.ZIP_DEFLATED
+            info.compress_type = compress_type if compress_type is not None else zipfile.ZIP_STORED
+        if info is None or info.compress_type not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+            # directories and the other compressions are left to zipfile
+            self.flush()
+            return super().writestr(zinfo_or_arcname, data, compress_type, compresslevel)
+        level = compresslevel if compresslevel is not None else self.strategy.level or zlib.Z_DEFAULT_COMPRESSION
+        if info.compress_type == zipfile.ZIP_DEFLATED and self.strategy.parallelBytes is not None and len(data) >= self.strategy.parallelBytes:
+            self._pending.append(getExecutor().submit(compressMember, info, data, level))
+            self._pendingBytes += len(data)
+            if self._pendingBytes >= maximumPendingBytes:
+                self.flush()
+            return
+        self.writePrepared(*compressMember(info, data, level))
+
+    def writePrepared(self, info, payload):
+        # a member whose CRC, sizes and compressed bytes are already known, written without touching them
+        self.flush()
+        with self._lock:
+            if self._writing:
+                raise ValueError("Can't write to the ZIP file while there is an open writing handle on it.")
+            if self._seekable:
+                self.fp.seek(self.start_dir)
+            info.header_offset = self.fp.tell()
+            self._writecheck(info)
+            self._didModify = True
+            self.fp.write(info.FileHeader())
+            self.fp.write(payload)
+            self.filelist.append(info)
+            self.NameToInfo[info.filename] = info
+            self.start_dir = self.fp.tell()
+
+    def flush(self):
+        pending, self._pending, self._pendingBytes = self._pending, [], 0
+        for future in pending:
+            self.writePrepared(*future.result())
+
+    def write(self, filename, arcname=None, compress_type=None, compresslevel=None):
+        self.flush()
+        return super().write(filename, arcname, compress_type, compresslevel)
+
+    def open(self, name, mode="r", pwd=None, *, force_zip64=False):
+        self.flush()
+        return super().open(name, mode, pwd, force_zip64=force_zip64)
+
+    def close(self):
+        if self.fp is not None and self.mode != "r":
+            self.flush()
+        super().close()
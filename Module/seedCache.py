@@ -0,0 +1,108 @@
+import contextlib, hashlib, json, os, tempfile, threading
+
+# session keys that change between requests without changing the generated seed
+volatileSettings = ["permaLink"]
+
+# part of every digest, bump it when a change to the generator makes the same settings give a different zip,
+# the entries made before it are then never served again and age out of the cache
+generatorVersion = 1
+
+
+def getSeedDigest(sessionDict, platform, cmdMenuChoice, randomBGM):
+    settings = {key: value for key, value in sessionDict.items() if key not in volatileSettings}
+    # only used for set operations, the order the worlds were picked in doesn't matter
+    settings["includeList"] = sorted(settings.get("includeList", []))
+    if isinstance(settings.get("enemyOptions"), str):
+        settings["enemyOptions"] = json.loads(settings["enemyOptions"])
+    # spoiler log seeds salt their random generator, so the same name places items differently with and without one.
+    # the flag comes from a checkbox ("on") or a stored permalink, normalize it so both hit the same entry
+    settings["spoilerLog"] = bool(settings.get("spoilerLog"))
+    canonical = json.dumps({"version": generatorVersion, "settings": settings, "platform": platform, "cmdMenuChoice": cmdMenuChoice, "randomBGM": randomBGM}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class SeedCache:
+    def __init__(self, directory=None, maxBytes=256*1024*1024, redisClient=None, redisTtl=24*60*60):
+        self.directory = directory or os.path.join(tempfile.gettempdir(), "kh2rando-seed-cache")
+        self.maxBytes = maxBytes
+        self.redisClient = redisClient
+        self.redisTtl = redisTtl
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def getPath(self, digest):
+        return os.path.join(self.directory, digest + ".zip")
+
+    def get(self, digest):
+        path = self.locate(digest)
+        if path is None:
+            return None
+        with open(path, "rb") as cachedZip:
+            return cachedZip.read()
+
+    def locate(self, digest):
+        # path of the cached zip on local disk, copied down from redis if only the shared tier has it
+        path = self.getPath(digest)
+        try:
+            # the modification time doubles as the last use for the LRU eviction
+            os.utime(path)
+            return path
+        except FileNotFoundError:
+            pass
+        if self.redisClient is not None:
+            data = self.redisClient.get(self.getRedisKey(digest))
+            if data is not None:
+                self.putLocal(digest, data)
+                return path
+        return None
+
+    def put(self, digest, data):
+        with self.writer(digest) as cachedZip:
+            cachedZip.write(data)
+
+    def putLocal(self, digest, data):
+        with self.writer(digest, share=False) as cachedZip:
+            cachedZip.write(data)
+
+    @contextlib.contextmanager
+    def writer(self, digest, share=True):
+        # a file the zip can be generated straight into, it only becomes the cached seed once it's complete
+        fd, temporaryPath = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w+b") as temporaryZip:
+                yield temporaryZip
+                data = None
+                if share and self.redisClient is not None:
+                    temporaryZip.seek(0)
+                    data = temporaryZip.read()
+        except BaseException:
+            os.remove(temporaryPath)
+            raise
+        os.replace(temporaryPath, self.getPath(digest))
+        if data is not None:
+            self.redisClient.set(self.getRedisKey(digest), data, ex=self.redisTtl)
+        self.evict()
+
+    def evict(self):
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.directory):
+                if not name.endswith(".zip"):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, name))
+            totalBytes = sum(size for _, size, _ in entries)
+            for _, size, name in sorted(entries):
+                if totalBytes <= self.maxBytes:
+                    break
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
+                totalBytes -= size
+
+    def getRedisKey(self, digest):
+        return "seedzip:" + digest
@@ -1,20 +1,108 @@
 
+from array import array
+from collections import defaultdict
+
 from Class.locationClass import KH2Location, KH2ItemStat, KH2LevelUp, KH2FormLevel, KH2Bonus, KH2Treasure, KH2StartingItem, KH2ItemStat, KH2Puzzle
 
 from List.configDict import itemType, locationType
 
 from Module.importantItems import getImportantChecks,getUsefulItems
-from Module.itemPlacementRestriction import ItemPlacementRestriction
+from Module.itemPlacementRestriction import get_item_restrictions
 from Module.startingInventory import StartingInventory
 
 
+class Inventory:
+    # item counts indexed by item id, membership and counts are O(1) for the requirement checks in ItemPlacementRestriction.
+    # mask has bit 1 << id set for every item held, the compiled rules test several items against it at once
+    size = 0x10000
+    _empty = array('I', bytes(4*size))
+
+    def __init__(self, itemIds=()):
+        self._counts = array('I', Inventory._empty)
+        self.mask = 0
+        self += itemIds
+
+    def append(self, itemId):
+        if not self._counts[itemId]:
+            self.mask |= 1 << itemId
+        self._counts[itemId] += 1
+
+    def __iadd__(self, itemIds):
+        for itemId in itemIds:
+            self.append(itemId)
+        return self
+
+    def __contains__(self, itemId):
+        return self._counts[itemId] > 0
+
+    def count(self, itemId):
+        return self._counts[itemId]
+
+    def presentMask(self, mask, itemIds):
+        return self.mask & mask
+
+
+class DependencyRecorder:
+    # passes checks through to the inventory and remembers which item ids a requirement looked at
+    def __init__(self, inventory):
+        self.inventory = inventory
+        self.itemIds = []
+
+    def __contains__(self, itemId):
+        self.itemIds.append(itemId)
+        return itemId in self.inventory
+
+    def count(self, itemId):
+        self.itemIds.append(itemId)
+        return self.inventory.count(itemId)
+
+    def presentMask(self, mask, itemIds):
+        self.itemIds += itemIds
+        return self.inventory.presentMask(mask, itemIds)
+
+
+def findSpheres(inventory, locked):
+    # locked holds (requirement, reward ids, key) entries, the inventory collects the rewards of everything reached.
+    # Returns the keys reached in each sphere, the first sphere needs nothing but the starting inventory.
+    # A requirement only depends on the item ids it looked at, so a location that failed its check
+    # waits in a reverse index until one of those items is collected and isn't looked at before that.
+    waiting = defaultdict(list)
+    scheduled = [True] * len(locked)
+    reached = [False] * len(locked)
+    current = list(range(len(locked)))
+    spheres = []
+    while current:
+        reachedNow = []
+        for index in current:
+            scheduled[index] = False
+            recorder = DependencyRecorder(inventory)
+            if locked[index][0](recorder):
+                reached[index] = True
+                reachedNow.append(index)
+            else:
+                for itemId in recorder.itemIds:
+                    waiting[itemId].append(index)
+        if not reachedNow:
+            break
+        spheres.append([locked[index][2] for index in reachedNow])
+        current = []
+        for index in reachedNow:
+            for itemId in locked[index][1]:
+                inventory.append(itemId)
+                for waitingIndex in waiting.pop(itemId, ()):
+                    if not reached[waitingIndex] and not scheduled[waitingIndex]:
+                        scheduled[waitingIndex] = True
+                        current.append(waitingIndex)
+    return spheres
+
+
 class SeedValidator:
     def __init__(self,sessionDict):
         nightmare = "Nightmare"==sessionDict["itemPlacementDifficulty"]
         if "Reverse Rando" in sessionDict["seedModifiers"]:
-            self.itemRestrictions = ItemPlacementRestriction("Reverse",nightmare)
+            self.itemRestrictions = get_item_restrictions("Reverse",nightmare)
         else:
-            self.itemRestrictions = ItemPlacementRestriction("Regular",nightmare)
+            self.itemRestrictions = get_item_restrictions("Regular",nightmare)
 
     def validateSeed(self, sessionDict, randomizer):
         startingInventory = sessionDict["startingInventory"]
@@ -27,7 +115,7 @@ class SeedValidator:
         plrpList = []
         [plrpList.append(location) for location in randomizer._allLocationList if isinstance(location, KH2StartingItem) and not location in plrpList]
         StartingInventory.generateStartingInventory(plrpList[0], startingInventory)
-        inventory = []
+        inventory = Inventory()
 
 
         # grab everything that can't possibly be locked by items
@@ -39,57 +127,46 @@ class SeedValidator:
         for i in lvupList:
             inventory.append(i.getReward())
 
-        treasure_restriction,bonus_restriction,form_restriction,puzzle_restriction = self.itemRestrictions.get_restriction_functions()
-
-        changed = True
-        depth = 0
-        while changed:
-            depth+=1
-            if len(trsrList)==0 and len(bonsList)==0 and len(fmlvList)==0:
-                print(f"Logic depth {depth}")
-                return True
-            changed = False
-            treasures_to_remove = []
-            bonuses_to_remove = []
-            forms_to_remove = []
-            puzzles_to_remove = []
-            # pass through remaining treasures and find unlockable things
-            for i in trsrList:
-                location_id = i.Id
-                reward_id = i.ItemId
-                if treasure_restriction(location_id)(inventory):
-                    treasures_to_remove.append(i)
-                    inventory.append(reward_id)
-                    changed = True
-            for i in bonsList:
-                location_id = i.RewardId
-                reward_id = i.getReward()
-                if bonus_restriction(location_id)(inventory):
-                    bonuses_to_remove.append(i)
-                    inventory.append(reward_id)
-                    changed = True
-            for i in fmlvList:
-                reward_id = i.Ability
-                if form_restriction(i.FormId,i.FormLevel)(inventory):
-                    forms_to_remove.append(i)
-                    inventory.append(reward_id)
-                    changed = True
-            for i in puzzleList:
-                reward_id = i.ItemId
-                if puzzle_restriction(i.Id)(inventory):
-                    puzzles_to_remove.append(i)
-                    inventory.append(reward_id)
-                    changed = True
-            for i in treasures_to_remove:
-                trsrList.remove(i)
-            for i in bonuses_to_remove:
-                bonsList.remove(i)
-            for i in forms_to_remove:
-                fmlvList.remove(i)
-            for i in puzzles_to_remove:
-                puzzleList.remove(i)
-
-        return False
+        treasures,bonuses,forms,puzzles = self.itemRestrictions.get_restriction_tables()
+
+        # unrestricted locations are always reachable, only the restricted ones have to be searched
+        locked = []
+        required = []
+        free = plrpList + lvupList
+        for i in trsrList:
+            if i.Id in treasures:
+                locked.append((treasures[i.Id], [i.ItemId], i))
+                required.append(i)
+            else:
+                free.append(i)
+        for i in bonsList:
+            if i.RewardId in bonuses:
+                locked.append((bonuses[i.RewardId], [i.getReward()], i))
+                required.append(i)
+            else:
+                free.append(i)
+        for i in fmlvList:
+            if (i.FormId,i.FormLevel) in forms:
+                locked.append((forms[(i.FormId,i.FormLevel)], [i.Ability], i))
+                required.append(i)
+            else:
+                free.append(i)
+        # puzzles can hold items, but the seed is completable without them
+        for i in puzzleList:
+            if i.Id in puzzles:
+                locked.append((puzzles[i.Id], [i.ItemId], i))
+            else:
+                free.append(i)
+        for i in free:
+            if not isinstance(i, (KH2StartingItem, KH2LevelUp)):
+                inventory.append(i.getReward())
+
+        spheres = findSpheres(inventory, locked)
+        # the logic depth each location is reached at, 0 for anything that is never locked
+        self.locationSpheres = [(location, 0) for location in free] + [(location, depth) for depth, sphere in enumerate(spheres, 1) for location in sphere]
+
+        reached = {id(location) for sphere in spheres for location in sphere}
+        return all(id(location) in reached for location in required)
 
 class SeedMetricsNumDatas:
     def metrics(self, randomizer):
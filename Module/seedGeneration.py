@@ -0,0 +1,154 @@
+import random, string
+from concurrent.futures import ProcessPoolExecutor
+
+from List.configDict import locationType
+from Module.hints import Hints
+from Module.metrics import seedRetries, span
+from Module.modifier import SeedModifier
+from Module.randomize import KH2Randomizer
+from Module.seedEvaluation import SeedValidator
+
+seedNameCharacters = string.ascii_letters + string.digits
+uncompletableError = "Seed is not completable! Trying another seed..."
+
+
+def getExcludeList(sessionDict):
+    excludeList = list(set(locationType) - set(sessionDict['includeList']))
+    excludeList.append(sessionDict["levelChoice"])
+
+    if sessionDict["itemPlacementDifficulty"] == "Nightmare" and locationType.Puzzle in excludeList:
+        print("Removing puzzle exclusion due to nightmare...")
+        excludeList.remove(locationType.Puzzle)
+    return excludeList
+
+
+def addModifierStartingInventory(sessionDict):
+    sessionDict["startingInventory"] += SeedModifier.library("Library of Assemblage" in sessionDict["seedModifiers"]) + SeedModifier.schmovement("Schmovement" in sessionDict["seedModifiers"])
+
+
+def retryReason(error):
+    return "uncompletable" if error == uncompletableError else "hints"
+
+
+def candidateSeedName(originalSeedName, index):
+    # candidate names only depend on the original name and their index, so the same permalink always finds the same winner
+    if index == 0:
+        return originalSeedName
+    candidateRandom = random.Random(f"{originalSeedName}-{index}")
+    return ''.join(candidateRandom.choice(seedNameCharacters) for i in range(30))
+
+
+def noProgress(stage):
+    pass
+
+
+class SeedGenerator:
+    def __init__(self, sessionDict, progress=noProgress):
+        self.sessionDict = sessionDict
+        # called with the name of each stage as generation reaches it
+        self.progress = progress
+        self.excludeList = getExcludeList(sessionDict)
+        self.seedValidation = SeedValidator(sessionDict)
+
+    def place(self, seedName):
+        # everything up to a validated placement, returns the randomizer and the error the seed name was rejected for
+        sessionDict = self.sessionDict
+        self.progress("placing")
+        randomizer = KH2Randomizer(seedName = seedName, seedHashIcons = sessionDict["seedHashIcons"], spoiler=bool(sessionDict["spoilerLog"]))
+        with span("populateLocations"):
+            randomizer.populateLocations(self.excludeList,  maxItemLogic = "Max Logic Item Placement" in sessionDict["seedModifiers"],item_difficulty=sessionDict["itemPlacementDifficulty"], reportDepth=sessionDict["reportDepth"])
+        with span("populateItems"):
+            randomizer.populateItems(promiseCharm = sessionDict["promiseCharm"], startingInventory = sessionDict["startingInventory"], abilityListModifier=SeedModifier.randomAbilityPool if "Randomize Ability Pool" in sessionDict["seedModifiers"] else None)
+        if not randomizer.validateCount():
+            raise ValueError("More items than locations, include more locations.")
+        with span("setKeybladeAbilities"):
+            randomizer.setKeybladeAbilities(
+                keybladeAbilities = sessionDict["keybladeAbilities"],
+                keybladeMinStat = int(sessionDict["keybladeMinStat"]),
+                keybladeMaxStat = int(sessionDict["keybladeMaxStat"])
+            )
+        randomizer.setNoAP("Start with No AP" in sessionDict["seedModifiers"])
+        with span("setRewards"):
+            completable = randomizer.setRewards(levelChoice = sessionDict["levelChoice"], betterJunk=("Better Junk" in sessionDict["seedModifiers"]), reportDepth=sessionDict["reportDepth"], logic=self.seedValidation.itemRestrictions if "Logic Aware Placement" in sessionDict["seedModifiers"] else None, restrictions=self.seedValidation.itemRestrictions)
+        if not completable:
+            # doomed by the item placement alone, no need to generate levels and bonus stats for it
+            return randomizer, uncompletableError
+        with span("setLevels"):
+            randomizer.setLevels(sessionDict["soraExpMult"], formExpMult = sessionDict["formExpMult"], statsList = SeedModifier.glassCannon("Glass Cannon" in sessionDict["seedModifiers"]))
+        with span("setBonusStats"):
+            randomizer.setBonusStats()
+        self.progress("validating")
+        with span("validateSeed"):
+            seedValid = self.seedValidation.validateSeed(sessionDict, randomizer)
+        if not seedValid:
+            return randomizer, uncompletableError
+        return randomizer, None
+
+    def attempt(self, seedName):
+        # returns the randomizer and its hints, or an error describing why this seed name was rejected
+        sessionDict = self.sessionDict
+        randomizer, error = self.place(seedName)
+        if error is not None:
+            return randomizer, None, error
+        randomizer.seedName = sessionDict["seed"]
+        self.progress("hints")
+        with span("generateHints"):
+            hintsText = Hints.generateHints(randomizer._locationItems, sessionDict["hintsType"], randomizer.seedName, self.excludeList, sessionDict["preventSelfHinting"], sessionDict["allowProofHinting"], randomizer.getRandom("hints"))
+
+        if hintsText is not None and type(hintsText) is not dict:
+            # there was an error generating hints, return value provides context
+            return randomizer, None, hintsText
+        return randomizer, hintsText, None
+
+    def search(self, workers=0):
+        if workers > 1:
+            return self.searchParallel(workers)
+        return self.searchSerial()
+
+    def searchSerial(self):
+        # tries the same candidate names in the same order as searchParallel, so both find the same seed
+        originalSeedName = self.sessionDict["seed"]
+        index = 0
+        while True:
+            randomizer, hintsText, error = self.attempt(candidateSeedName(originalSeedName, index))
+            if error is None:
+                return randomizer, hintsText
+            print(f"ERROR: {error}")
+            seedRetries.inc(reason=retryReason(error))
+            index += 1
+
+    def searchParallel(self, workers):
+        # tries a batch of candidate names at once and keeps the valid one with the lowest index,
+        # which makes the result independent of timing and of the number of workers
+        originalSeedName = self.sessionDict["seed"]
+        executor = getProcessPool(workers)
+        start = 0
+        while True:
+            self.progress("placing")
+            futures = [executor.submit(candidateError, self.sessionDict, candidateSeedName(originalSeedName, start + i)) for i in range(workers)]
+            for index, future in enumerate(futures):
+                # a candidate cancelled for a winner whose rebuild then failed is tried here instead
+                error = None if future.cancelled() else future.result()
+                if error is None:
+                    for pending in futures[index+1:]:
+                        pending.cancel()
+                    # rebuild the winner here, seeding by name makes it identical to the one the worker validated
+                    randomizer, hintsText, error = self.attempt(candidateSeedName(originalSeedName, start + index))
+                    if error is None:
+                        return randomizer, hintsText
+                print(f"ERROR: {error}")
+                seedRetries.inc(reason=retryReason(error))
+            start += workers
+
+
+processPools = {}
+
+def getProcessPool(workers):
+    # the pool is kept for the lifetime of the process so searches don't pay for starting workers every time
+    if workers not in processPools:
+        processPools[workers] = ProcessPoolExecutor(max_workers=workers)
+    return processPools[workers]
+
+def candidateError(sessionDict, seedName):
+    randomizer, hintsText, error = SeedGenerator(sessionDict).attempt(seedName)
+    return error
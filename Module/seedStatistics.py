@@ -0,0 +1,148 @@
+import argparse, contextlib, copy, csv, io, json, os, statistics, time
+from collections import Counter
+from multiprocessing import Pool
+
+from Module.importantItems import getImportantChecks, getUsefulItems
+from Module.seedEvaluation import SeedMetricsNumDatas, SeedMetricsNumCritExtra
+from Module.seedGeneration import SeedGenerator, addModifierStartingInventory, candidateSeedName
+
+# Places items for many seeds without hints or zips and collects statistics to tune item weights against:
+#   python -m Module.seedStatistics settings.json --seeds 100000 --difficulties Normal Insane --output stats/
+# Every shard of seeds is written to its own pair of CSV files, rerunning the same command skips the
+# shards that are already there, so an interrupted run picks up where it stopped. When all shards
+# are done they are summed into frequencies-<difficulty>.csv (how often each item landed on each location)
+# and histograms-<difficulty>.csv (how many seeds had each value of each metric).
+
+seedMetrics = {
+    "numDatas": SeedMetricsNumDatas(),
+    "numCritExtra": SeedMetricsNumCritExtra(),
+}
+metricNames = ["attempts", "logicDepth"] + list(seedMetrics)
+
+
+def shardPaths(outputDirectory, difficulty, shardIndex):
+    name = "{}-{:05d}.csv".format(difficulty.replace(" ", "_"), shardIndex)
+    return os.path.join(outputDirectory, "metrics-" + name), os.path.join(outputDirectory, "placements-" + name)
+
+
+def writeCsv(path, header, rows):
+    # written next to the target and renamed, so a shard file is either complete or missing
+    temporaryPath = path + ".tmp"
+    with open(temporaryPath, "w", newline="") as outFile:
+        writer = csv.writer(outFile)
+        writer.writerow(header)
+        writer.writerows(rows)
+    os.replace(temporaryPath, path)
+
+
+def placeSeed(generator, seedName):
+    # the same search as the web app, with candidate names that only depend on the seed name
+    attempts = 0
+    while True:
+        randomizer, error = generator.place(candidateSeedName(seedName, attempts))
+        attempts += 1
+        if error is None:
+            return randomizer, attempts
+
+
+def runShard(settings, difficulty, shardIndex, shardSize, outputDirectory, allItems=False):
+    metricsPath, placementsPath = shardPaths(outputDirectory, difficulty, shardIndex)
+    if os.path.exists(metricsPath) and os.path.exists(placementsPath):
+        return difficulty, shardIndex, False
+    sessionDict = copy.deepcopy(settings)
+    sessionDict["itemPlacementDifficulty"] = difficulty
+    sessionDict.setdefault("seedHashIcons", [])
+    sessionDict.setdefault("spoilerLog", False)
+    addModifierStartingInventory(sessionDict)
+    usefulItems = set(getImportantChecks() + getUsefulItems())
+    rows = []
+    placements = Counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        generator = SeedGenerator(sessionDict)
+        for index in range(shardIndex * shardSize, (shardIndex + 1) * shardSize):
+            seedName = "{}-{}".format(difficulty, index)
+            randomizer, attempts = placeSeed(generator, seedName)
+            logicDepth = max(sphere for location, sphere in generator.seedValidation.locationSpheres)
+            rows.append([seedName, attempts, logicDepth] + [metric.metrics(randomizer) for metric in seedMetrics.values()])
+            for location, item in randomizer._locationItems:
+                if allItems or item.Id in usefulItems:
+                    placements[(location.getDescription(), item.Id)] += 1
+    writeCsv(placementsPath, ["location", "item", "count"], [[location, itemId, count] for (location, itemId), count in sorted(placements.items())])
+    writeCsv(metricsPath, ["seed"] + metricNames, rows)
+    return difficulty, shardIndex, True
+
+
+def runShardArgs(args):
+    return runShard(*args)
+
+
+def summarize(outputDirectory, difficulty, shardCount):
+    # sums the shards of one difficulty, returns the mean of every metric
+    frequencies = Counter()
+    histograms = {name: Counter() for name in metricNames}
+    seeds = 0
+    for shardIndex in range(shardCount):
+        metricsPath, placementsPath = shardPaths(outputDirectory, difficulty, shardIndex)
+        with open(placementsPath, newline="") as placementsFile:
+            for row in csv.DictReader(placementsFile):
+                frequencies[(row["location"], int(row["item"]))] += int(row["count"])
+        with open(metricsPath, newline="") as metricsFile:
+            for row in csv.DictReader(metricsFile):
+                seeds += 1
+                for name in metricNames:
+                    histograms[name][int(row[name])] += 1
+    prefix = difficulty.replace(" ", "_")
+    writeCsv(os.path.join(outputDirectory, "frequencies-{}.csv".format(prefix)), ["location", "item", "count", "share"],
+             [[location, itemId, count, round(count / seeds, 6)] for (location, itemId), count in sorted(frequencies.items())])
+    writeCsv(os.path.join(outputDirectory, "histograms-{}.csv".format(prefix)), ["metric", "value", "seeds"],
+             [[name, value, count] for name in metricNames for value, count in sorted(histograms[name].items())])
+    return {name: statistics.fmean(histograms[name].elements()) if seeds else 0.0 for name in metricNames}
+
+
+def checkRun(outputDirectory, run):
+    # shards from a run with other settings would be mixed into the results, so resuming needs the same ones
+    runPath = os.path.join(outputDirectory, "run.json")
+    run = json.loads(json.dumps(run))
+    if os.path.exists(runPath):
+        with open(runPath) as runFile:
+            if json.load(runFile) != run:
+                raise ValueError("{} holds a run with different settings, use another output directory.".format(outputDirectory))
+        return
+    with open(runPath, "w") as runFile:
+        json.dump(run, runFile, indent=4)
+
+
+def runStatistics(settings, difficulties, seedCount, shardSize, outputDirectory, processes=None, allItems=False):
+    os.makedirs(outputDirectory, exist_ok=True)
+    checkRun(outputDirectory, {"settings": settings, "shardSize": shardSize, "allItems": allItems})
+    shardCount = -(-seedCount // shardSize)
+    jobs = [(settings, difficulty, shardIndex, shardSize, outputDirectory, allItems) for difficulty in difficulties for shardIndex in range(shardCount)]
+    start = time.perf_counter()
+    # the pool is shut down even when a shard fails, the shards already written are kept for the rerun
+    with contextlib.nullcontext() if processes == 1 else Pool(processes) as pool:
+        results = map(runShardArgs, jobs) if pool is None else pool.imap_unordered(runShardArgs, jobs)
+        for done, (difficulty, shardIndex, generated) in enumerate(results, 1):
+            print("{}/{} shards ({} shard {}{}) {:.0f}s".format(done, len(jobs), difficulty, shardIndex, "" if generated else ", already done", time.perf_counter() - start))
+    return {difficulty: summarize(outputDirectory, difficulty, shardCount) for difficulty in difficulties}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Collect placement statistics over many seeds.")
+    parser.add_argument("settings", help="settings json, in the format of the web session")
+    parser.add_argument("--seeds", type=int, default=1000, help="seeds per difficulty, rounded up to whole shards")
+    parser.add_argument("--difficulties", nargs="+", default=["Super Easy", "Easy", "Normal", "Hard", "Very Hard", "Insane", "Nightmare"])
+    parser.add_argument("--shard-size", type=int, default=500, help="seeds per shard file, the unit an interrupted run resumes from")
+    parser.add_argument("--output", default="stats", help="directory the shards and summaries are written to")
+    parser.add_argument("--processes", type=int, default=None, help="worker processes, defaults to the number of cores")
+    parser.add_argument("--all-items", action="store_true", help="count every item in the frequencies instead of only the important and useful ones")
+    args = parser.parse_args(argv)
+
+    with open(args.settings) as settingsFile:
+        settings = json.load(settingsFile)
+    means = runStatistics(settings, args.difficulties, args.seeds, args.shard_size, os.path.abspath(args.output), args.processes, args.all_items)
+    for difficulty, values in means.items():
+        print("{}: {}".format(difficulty, ", ".join("{} {:.2f}".format(name, value) for name, value in values.items())))
+
+
+if __name__ == '__main__':
+    main()
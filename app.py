@@ -3,7 +3,6 @@ from Module.randomCmdMenu import RandomCmdMenu
 from Module.randomBGM import RandomBGM
 from Module.startingInventory import StartingInventory
 from Module.modifier import SeedModifier
-from Module.seedEvaluation import SeedValidator
 from List.configDict import miscConfig, locationType, expTypes, keybladeAbilities, locationDepth
 from List.hashTextEntries import generateHashIcons
 import List.LocationList
@@ -13,26 +12,87 @@ import os, base64, string, datetime, random, ast, zipfile, redis, json, asyncio,
 from khbr.randomizer import Randomizer as khbr
 from Module.hints import Hints
 from Module.randomize import KH2Randomizer
+from Module.seedGeneration import SeedGenerator, addModifierStartingInventory
+from Module.seedCache import SeedCache, getSeedDigest
+from Module.seedArchive import getStrategy
+from Module.metrics import span, seedsServed, render as renderMetrics
+from Module.pageCache import DailyPageCache
+from Module.permalinkStore import PermalinkStore
+from Module.generationQueue import LocalGenerationQueue, RedisGenerationQueue
 from Module.dailySeed import generateDailySeed, getDailyModifiers
 from flask_socketio import SocketIO
+from itsdangerous import URLSafeTimedSerializer, BadSignature
 
 app = Flask(__name__, static_url_path='/static')
-socketio = SocketIO(app, manage_session=False, always_connect=True, async_mode="threading", ping_interval=20)
 url = urlparse(os.environ.get("REDIS_TLS_URL"))
 development_mode = os.environ.get("DEVELOPMENT_MODE")
+# with the redis queue seeds are generated by rq workers (worker.py), which reach the clients through the socketio message queue
+redis_generation_queue = os.environ.get("GENERATION_QUEUE") == "redis" and not development_mode
+socketio = SocketIO(app, manage_session=False, always_connect=True, async_mode="threading", ping_interval=20, message_queue=os.environ.get("REDIS_TLS_URL")+"?ssl_cert_reqs=none" if redis_generation_queue else None)
+# number of processes used to try candidate seed names at once, 0 keeps the serial search
+parallel_seed_search = int(os.environ.get("PARALLEL_SEED_SEARCH") or 0)
+# how the seed zips are compressed, stored (no compression), fast or small, see Module/seedArchive.py
+zip_compression = getStrategy(os.environ.get("ZIP_COMPRESSION") or "stored").name
 if not development_mode:
-    r = redis.Redis(host=url.hostname, port=url.port, ssl=True, ssl_cert_reqs=None,password=url.password)
+    # request threads share one pool, the timeouts keep a slow redis from holding on to them
+    redis_pool = redis.ConnectionPool(
+        connection_class = redis.SSLConnection,
+        host = url.hostname, port = url.port, password = url.password, ssl_cert_reqs = None,
+        socket_timeout = float(os.environ.get("REDIS_SOCKET_TIMEOUT") or 5),
+        socket_connect_timeout = float(os.environ.get("REDIS_CONNECT_TIMEOUT") or 5),
+        max_connections = int(os.environ.get("REDIS_MAX_CONNECTIONS") or 20)
+    )
+    r = redis.Redis(connection_pool=redis_pool)
+permalink_store = PermalinkStore(
+    r if not development_mode else None,
+    ttl = int(os.environ.get("PERMALINK_TTL") or 0) or None,
+    cacheSize = int(os.environ.get("PERMALINK_CACHE_SIZE") or 256)
+)
+# finished zips are cached on local disk, and optionally shared between dynos through redis
+seed_cache = SeedCache(
+    directory = os.environ.get("SEED_CACHE_DIR"),
+    maxBytes = int(os.environ.get("SEED_CACHE_MAX_MB") or 256) * 1024 * 1024,
+    # rq workers may run on another dyno, so the web process has to be able to fetch what they generated
+    redisClient = r if (os.environ.get("SEED_CACHE_REDIS") or redis_generation_queue) and not development_mode else None,
+    redisTtl = int(os.environ.get("SEED_CACHE_REDIS_TTL") or 24*60*60)
+)
 seed = None
 app.config['SECRET_KEY'] = os.environ.get("SECRET_KEY")
+# download links only name a cache entry, signing them with an expiry keeps them short lived
+download_tokens = URLSafeTimedSerializer(app.config['SECRET_KEY'], salt="seed-download")
+download_url_ttl = int(os.environ.get("DOWNLOAD_URL_TTL") or 10*60)
+# random seed names, hash icons and permalinks, seed generation itself never touches the global generator
+requestRandom = random.SystemRandom()
+def publishToClient(sid, event, payload):
+    socketio.emit(event, payload, to=sid)
+
+generation_max_pending = int(os.environ.get("GENERATION_MAX_PENDING") or 10)
+if redis_generation_queue:
+    generation_queue = RedisGenerationQueue(publishToClient, r, maxPending = generation_max_pending)
+else:
+    generation_queue = LocalGenerationQueue(publishToClient, workers = int(os.environ.get("GENERATION_WORKERS") or 2), maxPending = generation_max_pending)
 
 @app.context_processor
 def inject_today_date():
     return {'today_date': datetime.date.today()}
 
+# none of the options on the landing page change while the app runs, only the daily modifiers change once a day
+index_options = dict(locations = List.LocationList.getOptions(), expTypes = expTypes, miscConfig = miscConfig, keybladeAbilities = keybladeAbilities, bossEnemyConfig = khbr()._get_game(game="kh2").get_options(), hintSystems = Hints.getOptions(), startingInventory = StartingInventory.getOptions(), seedModifiers = SeedModifier.getOptions())
+index_page = DailyPageCache()
+
+def renderIndex(today, message=""):
+    return fl.render_template('index.jinja', message=message, dailyModifiers = getDailyModifiers(today), **index_options)
+
 @app.route('/', methods=['GET','POST'])
 def index(message=""):
     session.clear()
-    return fl.render_template('index.jinja', locations = List.LocationList.getOptions(), expTypes = expTypes, miscConfig = miscConfig, keybladeAbilities = keybladeAbilities, message=message, bossEnemyConfig = khbr()._get_game(game="kh2").get_options(), hintSystems = Hints.getOptions(), startingInventory = StartingInventory.getOptions(), seedModifiers = SeedModifier.getOptions(), dailyModifiers = getDailyModifiers(datetime.date.today()))
+    if message:
+        return renderIndex(datetime.date.today(), message)
+    page = index_page.get(datetime.date.today(), renderIndex)
+    response = fl.make_response(page.html)
+    response.set_etag(page.etag)
+    response.last_modified = page.lastModified
+    return response.make_conditional(fl.request)
 
 @app.route('/daily', methods=["GET", ])
 def dailySeed():
@@ -53,24 +113,16 @@ def dailySeed():
 @app.route('/seed/<hash>')
 def hashedSeed(hash):
     session.clear()
-    sessionVars = r.hgetall(hash)
-    for var in sessionVars:
-        session[str(var, 'utf-8')] = json.loads(sessionVars[var])
-    
-    includeList = session['includeList'][:]
-    session['includeList'].clear()
-
-    for location in includeList:
-        session['includeList'].append(locationType(location))
-
-    print(session)
+    sessionVars = permalink_store.load(hash)
+    if sessionVars is None:
+        fl.abort(404)
+    session.update(sessionVars)
+    session['includeList'] = [locationType(location) for location in session['includeList']]
     return seed()
 
 @app.route('/seed',methods=['GET','POST'])
 def seed():
     if fl.request.method == "POST":
-        random.seed(str(datetime.datetime.now()))
-
         session['keybladeAbilities'] = fl.request.form.getlist('keybladeAbilities')
 
         if session['keybladeAbilities'] == []:
@@ -82,12 +134,12 @@ def seed():
         if session['seed'] == "":
             characters = string.ascii_letters + string.digits
 
-            session['seed'] = (''.join(random.choice(characters) for i in range(30)))
+            session['seed'] = (''.join(requestRandom.choice(characters) for i in range(30)))
 
         includeList = fl.request.form.getlist('include') or []
 
         session['includeList'] = [locationType[location.replace("locationType.","")] for location in includeList]
-        session['seedHashIcons'] = generateHashIcons()
+        session['seedHashIcons'] = generateHashIcons(requestRandom)
 
         session['formExpMult'] = {
             0: float(fl.request.form.get("SummonExp")),
@@ -143,12 +195,9 @@ def seed():
 
         session['itemPlacementDifficulty'] = fl.request.form.get("itemPlacementDifficulty")
 
-        session['permaLink'] = ''.join(random.choice(string.ascii_uppercase) for i in range(8))
+        session['permaLink'] = ''.join(requestRandom.choice(string.ascii_uppercase) for i in range(8))
         if not development_mode:
-            with r.pipeline() as pipe:
-                for key in session.keys():
-                    pipe.hmset(session['permaLink'], {key.encode('utf-8'): json.dumps(session.get(key)).encode('utf-8')})
-                pipe.execute()
+            permalink_store.save(session['permaLink'], dict(session))
     
     return fl.render_template('seed.jinja',
     spoilerLog = session.get('spoilerLog'),
@@ -185,76 +234,69 @@ def handleConnection():
 @socketio.on('download')
 def startDownload(data):
     print("Started")
-    seed = socketio.start_background_task(randomizePage, data, dict(session))
-    
+    sid = fl.request.sid
+    if generation_queue.submit(sid, runGeneration, data, dict(session)) is None:
+        socketio.emit('queue_full', {"message": "The generator is busy, please try again in a minute."}, to=sid)
+
+def runGeneration(sid, data, sessionDict):
+    if isinstance(generation_queue, RedisGenerationQueue):
+        generation_queue.publishPositions()
+    randomizePage(sid, data, sessionDict)
 
-def randomizePage(data, sessionDict):
+def randomizePage(sid, data, sessionDict):
     print(data['platform'])
     platform = data['platform']
-    excludeList = list(set(locationType) - set(sessionDict['includeList']))
-    excludeList.append(sessionDict["levelChoice"])
-
-    if sessionDict["itemPlacementDifficulty"] == "Nightmare" and locationType.Puzzle in excludeList:
-        print("Removing puzzle exclusion due to nightmare...")
-        excludeList.remove(locationType.Puzzle)
 
     cmdMenuChoice = data["cmdMenuChoice"]
     randomBGM = data["randomBGM"]
-    sessionDict["startingInventory"] += SeedModifier.library("Library of Assemblage" in sessionDict["seedModifiers"]) + SeedModifier.schmovement("Schmovement" in sessionDict["seedModifiers"])
-
-    seedValidation = SeedValidator(sessionDict)
-    notValidSeed = True
-
-    originalSeedName = sessionDict['seed']
-    while notValidSeed:
-        randomizer = KH2Randomizer(seedName = sessionDict["seed"], seedHashIcons = sessionDict["seedHashIcons"], spoiler=bool(sessionDict["spoilerLog"]))
-        randomizer.populateLocations(excludeList,  maxItemLogic = "Max Logic Item Placement" in sessionDict["seedModifiers"],item_difficulty=sessionDict["itemPlacementDifficulty"], reportDepth=sessionDict["reportDepth"])
-        randomizer.populateItems(promiseCharm = sessionDict["promiseCharm"], startingInventory = sessionDict["startingInventory"], abilityListModifier=SeedModifier.randomAbilityPool if "Randomize Ability Pool" in sessionDict["seedModifiers"] else None)
-        if randomizer.validateCount():
-            randomizer.setKeybladeAbilities(
-                keybladeAbilities = sessionDict["keybladeAbilities"], 
-                keybladeMinStat = int(sessionDict["keybladeMinStat"]), 
-                keybladeMaxStat = int(sessionDict["keybladeMaxStat"])
-            )
-            randomizer.setNoAP("Start with No AP" in sessionDict["seedModifiers"])
-            randomizer.setRewards(levelChoice = sessionDict["levelChoice"], betterJunk=("Better Junk" in sessionDict["seedModifiers"]), reportDepth=sessionDict["reportDepth"])
-            randomizer.setLevels(sessionDict["soraExpMult"], formExpMult = sessionDict["formExpMult"], statsList = SeedModifier.glassCannon("Glass Cannon" in sessionDict["seedModifiers"]))
-            randomizer.setBonusStats()
-            if not seedValidation.validateSeed(sessionDict, randomizer):
-                print("ERROR: Seed is not completable! Trying another seed...")
-                characters = string.ascii_letters + string.digits
-                sessionDict['seed'] = (''.join(random.choice(characters) for i in range(30)))
-                continue
-            randomizer.seedName = originalSeedName
-            hintsText = Hints.generateHints(randomizer._locationItems, sessionDict["hintsType"], randomizer.seedName, excludeList, sessionDict["preventSelfHinting"], sessionDict["allowProofHinting"])
-
-            if hintsText is not None and type(hintsText) is not dict:
-                # there was an error generating hints, return value provides context
-                print(f"ERROR: {hintsText}")
-                characters = string.ascii_letters + string.digits
-                sessionDict['seed'] = (''.join(random.choice(characters) for i in range(30)))
-                continue
-
-            notValidSeed = False
-            
-            try:
-                zip = randomizer.generateZip(randomBGM = randomBGM, platform = platform, startingInventory = sessionDict["startingInventory"], hintsText = hintsText, cmdMenuChoice = cmdMenuChoice, spoilerLog = bool(sessionDict["spoilerLog"]), enemyOptions = json.loads(sessionDict["enemyOptions"]))
-                if development_mode:
-                    development_mode_path = os.environ.get("DEVELOPMENT_MODE_PATH")
-                    if development_mode_path:
-                        if os.path.exists(development_mode_path):
-                            # Ensure a clean environment
-                            import shutil
-                            shutil.rmtree(development_mode_path)
-                        # Unzip mod into path
-                        import zipfile
-                        zipfile.ZipFile(zip).extractall(development_mode_path)
-                        print("unzipped into {}".format(development_mode_path))
-                    return
-                socketio.emit('file',zip.read())
-
-            except ValueError as err:
-                print("ERROR: ", err.args)
+    seedDigest = getSeedDigest(sessionDict, platform, cmdMenuChoice, randomBGM)
+    addModifierStartingInventory(sessionDict)
+
+    try:
+        if seed_cache.locate(seedDigest) is None:
+            progress = lambda stage: publishToClient(sid, 'progress', {"stage": stage})
+            randomizer, hintsText = SeedGenerator(sessionDict, progress).search(workers = parallel_seed_search)
+            # the zip is written straight into the cache file the download is served from
+            with span("generateZip"), seed_cache.writer(seedDigest) as zipFile:
+                randomizer.generateZip(randomBGM = randomBGM, platform = platform, startingInventory = sessionDict["startingInventory"], hintsText = hintsText, cmdMenuChoice = cmdMenuChoice, spoilerLog = bool(sessionDict["spoilerLog"]), enemyOptions = json.loads(sessionDict["enemyOptions"]), progress = progress, outFile = zipFile, compression = zip_compression)
+            seedsServed.inc(source="generated")
+        else:
+            print("Serving cached seed {}".format(seedDigest))
+            seedsServed.inc(source="cache")
+        if development_mode:
+            development_mode_path = os.environ.get("DEVELOPMENT_MODE_PATH")
+            if development_mode_path:
+                if os.path.exists(development_mode_path):
+                    # Ensure a clean environment
+                    import shutil
+                    shutil.rmtree(development_mode_path)
+                # Unzip mod into path
+                import zipfile
+                zipfile.ZipFile(seed_cache.getPath(seedDigest)).extractall(development_mode_path)
+                print("unzipped into {}".format(development_mode_path))
+            return
+        # the zip is fetched over plain http, which lets the browser resume a broken transfer with range requests
+        publishToClient(sid, 'download_ready', {"url": "/download/" + download_tokens.dumps(seedDigest)})
+
+    except ValueError as err:
+        print("ERROR: ", err.args)
+        publishToClient(sid, 'generation_failed', {})
+
+@app.route('/download/<token>')
+def downloadSeed(token):
+    try:
+        seedDigest = download_tokens.loads(token, max_age=download_url_ttl)
+    except BadSignature:
+        fl.abort(404)
+    path = seed_cache.locate(seedDigest)
+    if path is None:
+        fl.abort(404)
+    return fl.send_file(path, mimetype="application/zip", as_attachment=True, attachment_filename="randoseed.zip", conditional=True)
+
+@app.route('/metrics')
+def metrics():
+    # per process, with the redis queue the generation stages are recorded by the rq workers instead
+    return Response(renderMetrics(), mimetype="text/plain; version=0.0.4")
 
 @app.after_request
 def add_header(r):
@@ -270,13 +312,3 @@ def add_header(r):
     
 if __name__ == '__main__':
     socketio.run(app)
-    randomizer = KH2Randomizer("fdh6h34q6h4q6g62g6h6w46hw464vbvherby39")
-    randomizer.populateLocations([locationType.LoD, "ExcludeFrom50"])
-    randomizer.populateItems(startingInventory=["138","537","369"])
-    if randomizer.validateCount():
-        randomizer.setKeybladeAbilities()
-        randomizer.setRewards()
-        randomizer.setLevels(soraExpMult = 1.5, formExpMult = {'1':6, '2':3, '3':3, '4':3, '5':3})
-        randomizer.setBonusStats()
-        zip = randomizer.generateZip(hintsType="JSmartee").getbuffer()
-        open("randoSeed.zip", "wb").write(zip)
@@ -0,0 +1,127 @@
+import sys
+sys.path.append("..")
+from List.configDict import locationType, locationDepth
+from Module.seedGeneration import SeedGenerator, addModifierStartingInventory
+from Module.metrics import seedRetries
+from Module.seedArchive import compressionStrategies
+from sessionSettings import getDefaultSession
+import argparse, copy, json, multiprocessing, os, resource, time
+
+# End to end generation benchmark, not run as part of the tests:
+#   python benchmark.py --seeds 10 --output results.json
+#   python benchmark.py --seeds 10 --output results.json --compare baseline.json
+
+baseSettings = getDefaultSession(keybladeAbilities=["Support", "Action"])
+
+
+def getSettingsMatrix():
+    # every entry changes one setting from the base, so a regression points at the setting that caused it
+    matrix = [("base", {}, "PCSX2"), ("platformPC", {}, "PC")]
+    for difficulty in ["Super Easy", "Easy", "Hard", "Very Hard", "Insane", "Nightmare"]:
+        matrix.append(("difficulty" + difficulty.replace(" ", ""), {"itemPlacementDifficulty": difficulty}, "PCSX2"))
+    for hintsType in ["Shananas", "Points"]:
+        matrix.append(("hints" + hintsType, {"hintsType": hintsType}, "PCSX2"))
+    for modifier in ["Reverse Rando", "Max Logic Item Placement", "Logic Aware Placement"]:
+        matrix.append(("modifier" + modifier.replace(" ", ""), {"seedModifiers": [modifier]}, "PCSX2"))
+    matrix.append(("puzzles", {"includeList": baseSettings["includeList"] + [locationType.Puzzle]}, "PCSX2"))
+    for depth in locationDepth:
+        if depth != baseSettings["reportDepth"]:
+            matrix.append(("reportDepth" + depth.value, {"reportDepth": depth}, "PCSX2"))
+    return matrix
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered)-1, int(round(fraction * (len(ordered)-1))))]
+
+
+def runConfiguration(name, overrides, platform, seeds, compressions=("stored",)):
+    latencies = []
+    zipSeconds = {compression: [] for compression in compressions}
+    zipBytes = {compression: [] for compression in compressions}
+    retriesBefore = seedRetries.total()
+    start = time.perf_counter()
+    for index in range(seeds):
+        sessionDict = copy.deepcopy(baseSettings)
+        sessionDict.update(copy.deepcopy(overrides))
+        sessionDict["seed"] = "benchmark-{}-{}".format(name, index)
+        addModifierStartingInventory(sessionDict)
+        seedStart = time.perf_counter()
+        randomizer, hintsText = SeedGenerator(sessionDict).search()
+        # the latency counts the first compression, the others are only timed on their own
+        for compression in compressions:
+            zipStart = time.perf_counter()
+            zipFile = randomizer.generateZip(platform = platform, randomBGM = [], startingInventory = sessionDict["startingInventory"], hintsText = hintsText, spoilerLog = sessionDict["spoilerLog"], enemyOptions = json.loads(sessionDict["enemyOptions"]), compression = compression)
+            zipEnd = time.perf_counter()
+            if compression == compressions[0]:
+                latencies.append(zipEnd - seedStart)
+            zipSeconds[compression].append(zipEnd - zipStart)
+            zipBytes[compression].append(len(zipFile.getbuffer()))
+    elapsed = time.perf_counter() - start
+    return {
+        "seeds": seeds,
+        "seedsPerSecond": seeds / elapsed,
+        "p50": percentile(latencies, 0.5),
+        "p99": percentile(latencies, 0.99),
+        "retriesPerSeed": (seedRetries.total() - retriesBefore) / seeds,
+        # main() runs every configuration in a fresh process, so this is the peak of this configuration alone.
+        # ru_maxrss is in kilobytes on linux
+        "peakRssKb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "compression": {compression: {"zipSeconds": sum(zipSeconds[compression]) / seeds, "zipBytes": sum(zipBytes[compression]) / seeds} for compression in compressions},
+    }
+
+
+def compareResults(results, baseline, tolerance):
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        previous = baseline[name]
+        if result["seedsPerSecond"] < previous["seedsPerSecond"] * (1 - tolerance):
+            regressions.append("{}: {:.2f} seeds/s, baseline {:.2f}".format(name, result["seedsPerSecond"], previous["seedsPerSecond"]))
+        if result["p99"] > previous["p99"] * (1 + tolerance):
+            regressions.append("{}: p99 {:.3f}s, baseline {:.3f}s".format(name, result["p99"], previous["p99"]))
+        if result["retriesPerSeed"] > previous["retriesPerSeed"] * (1 + tolerance) + 0.5:
+            regressions.append("{}: {:.2f} retries per seed, baseline {:.2f}".format(name, result["retriesPerSeed"], previous["retriesPerSeed"]))
+        if result["peakRssKb"] > previous["peakRssKb"] * (1 + tolerance):
+            regressions.append("{}: peak RSS {} KB, baseline {} KB".format(name, result["peakRssKb"], previous["peakRssKb"]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark seed generation across a matrix of settings.")
+    parser.add_argument("--seeds", type=int, default=10, help="seeds generated per configuration")
+    parser.add_argument("--output", default="benchmark.json")
+    parser.add_argument("--only", nargs="*", help="names of the configurations to run")
+    parser.add_argument("--compare", help="baseline results to flag regressions against")
+    parser.add_argument("--compression", nargs="+", default=["stored"], choices=list(compressionStrategies), help="zip compressions to time and size, the first one counts towards the latency")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative slowdown before a configuration counts as a regression")
+    args = parser.parse_args()
+    outputPath = os.path.abspath(args.output)
+    comparePath = os.path.abspath(args.compare) if args.compare else None
+
+    results = {}
+    # spawned rather than forked, a forked child would start with the peak memory of the parent
+    context = multiprocessing.get_context("spawn")
+    for name, overrides, platform in getSettingsMatrix():
+        if args.only and name not in args.only:
+            continue
+        with context.Pool(1) as pool:
+            results[name] = pool.apply(runConfiguration, (name, overrides, platform, args.seeds, tuple(args.compression)))
+        print("{:<28} {:6.2f} seeds/s  p50 {:.3f}s  p99 {:.3f}s  {:.2f} retries/seed  {:.0f} MB peak".format(name, results[name]["seedsPerSecond"], results[name]["p50"], results[name]["p99"], results[name]["retriesPerSeed"], results[name]["peakRssKb"] / 1024))
+        for compression, report in results[name]["compression"].items():
+            print("{:<28}   zip {:<8} {:.3f}s  {:.0f} KB".format("", compression, report["zipSeconds"], report["zipBytes"] / 1024))
+    with open(outputPath, "w") as outFile:
+        json.dump(results, outFile, indent=4)
+
+    if comparePath:
+        with open(comparePath) as baselineFile:
+            regressions = compareResults(results, json.load(baselineFile), args.tolerance)
+        for regression in regressions:
+            print("REGRESSION: " + regression)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
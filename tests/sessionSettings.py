@@ -0,0 +1,29 @@
+from List.configDict import locationType, locationDepth
+
+# The settings a session holds when randomizePage reads it, shared by the tests and the benchmark.
+# Tests pass the settings they care about as overrides, settings added to the site only need adding here.
+
+
+def getDefaultSession(**overrides):
+    sessionDict = {
+        "seedHashIcons": [],
+        "spoilerLog": False,
+        "includeList": [locationType.LoD, locationType.BC, locationType.HB, locationType.TT, locationType.TWTNW, locationType.SP, locationType.PR, locationType.OC, locationType.Agrabah, locationType.HT, locationType.PL, locationType.DC, locationType.HUNDREDAW, locationType.STT, locationType.FormLevel, locationType.Free, locationType.Critical],
+        "levelChoice": "ExcludeFrom50",
+        "itemPlacementDifficulty": "Normal",
+        "seedModifiers": [],
+        "reportDepth": locationDepth.SecondVisit,
+        "promiseCharm": True,
+        "startingInventory": [],
+        "keybladeAbilities": ["Support"],
+        "keybladeMinStat": 0,
+        "keybladeMaxStat": 7,
+        "soraExpMult": 3,
+        "formExpMult": {'0':3, '1':3, '2':3, '3':3, '4':3, '5':3},
+        "hintsType": "JSmartee",
+        "preventSelfHinting": True,
+        "allowProofHinting": True,
+        "enemyOptions": '{"boss": "Disabled", "enemy": "Disabled", "remove_damage_cap": false}',
+    }
+    sessionDict.update(overrides)
+    return sessionDict
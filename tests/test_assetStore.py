@@ -0,0 +1,44 @@
+import sys
+sys.path.append("..")
+from Module.assetStore import getAsset, getMember, writeMember, getPuzzleBar, rootPath
+import unittest, io, os, random, zipfile
+
+
+class Tests(unittest.TestCase):
+    def test_readOnce(self):
+        assert getAsset("static/jiminy.bar") is getAsset("static/jiminy.bar")
+        assert len(getAsset("static/jiminy.bar")) == os.path.getsize(os.path.join(rootPath, "static/jiminy.bar"))
+
+    def test_memberSameAsWrite(self):
+        # the prepared icon has to give the same entry as writing the file, in every archive it goes into
+        modInfo = zipfile.ZipInfo("mod.yml", (2022, 3, 28, 0, 0, 0))
+        written = io.BytesIO()
+        with zipfile.ZipFile(written, "w") as outZip:
+            outZip.writestr(modInfo, "title: Randomizer Seed\r\n")
+            outZip.write(os.path.join(rootPath, "Module/icon.png"), "icon.png")
+        for i in range(2):
+            prepared = io.BytesIO()
+            with zipfile.ZipFile(prepared, "w") as outZip:
+                outZip.writestr(modInfo, "title: Randomizer Seed\r\n")
+                writeMember(outZip, getMember("Module/icon.png", "icon.png"))
+            assert prepared.getvalue() == written.getvalue()
+            assert zipfile.ZipFile(prepared).testzip() is None
+
+    def test_puzzleBar(self):
+        # the strided write has to patch the same bytes as setting them one by one, in any puzzle order
+        rng = random.Random("test_puzzleBar")
+        for i in range(20):
+            puzzleIds = rng.sample(range(6), rng.randrange(7)) if i % 2 else list(range(6))
+            rewards = tuple((24420+puzzleId*16, 24420+puzzleId*16+1, rng.randrange(1, 0x10000)) for puzzleId in puzzleIds)
+            expected = bytearray(getAsset("static/jiminy.bar"))
+            for byte0, byte1, item in rewards:
+                expected[byte0] = item & 0x00FF
+                expected[byte1] = item >> 8
+            bar = getPuzzleBar(rewards)
+            assert bytes(bar) == expected
+            assert bar.readonly and getPuzzleBar(rewards) is bar
+
+
+ut = Tests()
+
+unittest.main()
@@ -0,0 +1,35 @@
+import sys
+sys.path.append("..")
+from sessionSettings import getDefaultSession
+from Module.batchGenerate import main
+import unittest, tempfile, os, json, zipfile, hashlib
+
+
+class Tests(unittest.TestCase):
+    def test_batchWritesZipsAndManifest(self):
+        with tempfile.TemporaryDirectory() as directory:
+            settingsPath = os.path.join(directory, "settings.json")
+            with open(settingsPath, "w") as settingsFile:
+                json.dump(self.createSettings(), settingsFile)
+            outputDirectory = os.path.join(directory, "seeds")
+            main([settingsPath, "--names", "batchOne", "batchTwo", "--output", outputDirectory, "--processes", "2"])
+
+            with open(os.path.join(outputDirectory, "manifest.json")) as manifestFile:
+                manifest = json.load(manifestFile)
+            assert [entry["seed"] for entry in manifest["seeds"]] == ["batchOne", "batchTwo"]
+            assert manifest["seeds"][0]["seedHashIcons"] != manifest["seeds"][1]["seedHashIcons"]
+            for entry in manifest["seeds"]:
+                with open(os.path.join(outputDirectory, entry["file"]), "rb") as seedFile:
+                    zipBytes = seedFile.read()
+                assert hashlib.sha256(zipBytes).hexdigest() == entry["sha256"]
+                with zipfile.ZipFile(os.path.join(outputDirectory, entry["file"])) as seedZip:
+                    assert "mod.yml" in seedZip.namelist()
+
+    @staticmethod
+    def createSettings():
+        # settings files may hold the enemy options as an object
+        return getDefaultSession(enemyOptions={"boss": "Disabled", "enemy": "Disabled", "remove_damage_cap": False}, platform="PC")
+
+ut = Tests()
+
+unittest.main()
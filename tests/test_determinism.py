@@ -4,7 +4,7 @@ sys.path.append("..")
 from Class.locationClass import KH2FormLevel,KH2Treasure
 from List.configDict import itemType,locationDepth,locationType
 from Module.randomize import KH2Randomizer
-import unittest
+import unittest, random
 
 
 class Tests(unittest.TestCase):
@@ -18,6 +18,27 @@ class Tests(unittest.TestCase):
                     assert previous_locations[i]==current_locations[i]
                 previous_locations = current_locations
 
+    def test_interleavedStages(self):
+        # each stage has its own generator, so other seeds and global draws in between change nothing
+        def stages(seedName):
+            randomizer = KH2Randomizer(seedName = seedName)
+            yield randomizer.populateLocations([])
+            yield randomizer.populateItems(promiseCharm = True, startingInventory = [], abilityListModifier=None)
+            yield randomizer.setKeybladeAbilities()
+            yield randomizer.setRewards()
+            yield randomizer.setLevels(5,{'0':3, '1':3, '2':3, '3':3, '4':3, '5':3})
+            yield randomizer.setBonusStats()
+            yield randomizer
+
+        def summary(randomizer):
+            return [(location.getDescription(), item.Id) for location, item in randomizer._locationItems]
+
+        alone = [summary(list(stages(seedName))[-1]) for seedName in ["interleavedOne", "interleavedTwo"]]
+        first, second = stages("interleavedOne"), stages("interleavedTwo")
+        for firstResult, secondResult in zip(first, second):
+            random.seed(random.random())
+            random.random()
+        assert [summary(firstResult), summary(secondResult)] == alone
 
     @staticmethod
     def createSeed(seedName,treasure_items,treasure_locations,form_items,form_locations):
@@ -0,0 +1,59 @@
+import sys
+sys.path.append("..")
+from Module.generationQueue import LocalGenerationQueue
+import unittest, threading
+
+
+class Tests(unittest.TestCase):
+    def test_rejectsWhenFull(self):
+        events = []
+        release = threading.Event()
+        started = threading.Event()
+        def blockingJob(sid):
+            started.set()
+            release.wait(5)
+        queue = LocalGenerationQueue(lambda sid, event, payload: events.append((sid, event, payload)), workers=1, maxPending=2)
+        self.assertEqual(queue.submit("running", blockingJob), 1)
+        started.wait(5)
+        self.assertEqual(queue.submit("first", blockingJob), 1)
+        self.assertEqual(queue.submit("second", blockingJob), 2)
+        self.assertIsNone(queue.submit("rejected", blockingJob))
+        release.set()
+        self.assertNotIn("rejected", [sid for sid, _, _ in events])
+
+    def test_positionsMoveUp(self):
+        events = []
+        release = threading.Event()
+        started = threading.Event()
+        finished = threading.Event()
+        def blockingJob(sid):
+            started.set()
+            release.wait(5)
+        queue = LocalGenerationQueue(lambda sid, event, payload: events.append((sid, event, payload)), workers=1, maxPending=5)
+        queue.submit("running", blockingJob)
+        started.wait(5)
+        queue.submit("first", blockingJob)
+        queue.submit("second", lambda sid: finished.set())
+        self.assertIn(("second", "queued", {"position": 2}), events)
+        release.set()
+        self.assertTrue(finished.wait(5))
+        self.assertIn(("second", "queued", {"position": 1}), events)
+
+    def test_failedJobIsReported(self):
+        events = []
+        done = threading.Event()
+        def publish(sid, event, payload):
+            events.append((sid, event))
+            if event == "generation_failed":
+                done.set()
+        def failingJob(sid):
+            raise RuntimeError("broken")
+        queue = LocalGenerationQueue(publish, workers=1)
+        queue.submit("client", failingJob)
+        self.assertTrue(done.wait(5))
+        self.assertIn(("client", "generation_failed"), events)
+
+
+ut = Tests()
+
+unittest.main()
@@ -4,8 +4,10 @@ sys.path.append("..")
 from Class.locationClass import KH2FormLevel,KH2Treasure
 from List.configDict import itemType
 from Module.randomize import KH2Randomizer
-from Module.seedEvaluation import SeedValidator
-import unittest
+from Module.seedEvaluation import SeedValidator, Inventory, findSpheres
+from Module.itemPlacementRestriction import ItemPlacementRestriction
+from Module.importantItems import getLogicItems
+import unittest, random
 
 
 class Tests(unittest.TestCase):
@@ -94,11 +96,64 @@ class Tests(unittest.TestCase):
         randomizer.setBonusStats()
         return randomizer
 
+    def test_inventoryMatchesList(self):
+        # the restriction checks were written against lists, the counting inventory has to give the same answers
+        rng = random.Random("test_inventoryMatchesList")
+        logicItems = getLogicItems() + [32]*4 + [87, 23, 23]
+        for mode, nightmare in [("Regular", False), ("Reverse", False), ("Regular", True)]:
+            treasure_restriction, bonus_restriction, form_restriction, puzzle_restriction = ItemPlacementRestriction(mode, nightmare).get_restriction_functions()
+            requirements = [treasure_restriction(location_id) for location_id in range(600)] + [bonus_restriction(location_id) for location_id in range(60)]
+            requirements += [form_restriction(form_id, form_level) for form_id in range(1, 6) for form_level in range(2, 8)] + [puzzle_restriction(puzzle_id) for puzzle_id in range(1, 6)]
+            for i in range(200):
+                inventoryList = rng.sample(logicItems, rng.randrange(len(logicItems)))
+                inventory = Inventory(inventoryList)
+                for requirement in requirements:
+                    assert requirement(inventoryList) == requirement(inventory)
+
+    def test_spheresMatchFixedPoint(self):
+        # the worklist has to reach the same locations in the same spheres as checking everything each round
+        rng = random.Random("test_spheresMatchFixedPoint")
+        logicItems = getLogicItems() + [32]*4 + [87, 23, 23]
+        for mode, nightmare in [("Regular", False), ("Reverse", False), ("Regular", True)]:
+            treasures, bonuses, forms, puzzles = ItemPlacementRestriction(mode, nightmare).get_restriction_tables()
+            requirements = list(treasures.values()) + list(bonuses.values()) + list(forms.values()) + list(puzzles.values())
+            for i in range(50):
+                locked = [(requirement, rng.sample(logicItems, rng.choice([0, 0, 1])), index) for index, requirement in enumerate(requirements)]
+                startingItems = rng.sample(logicItems, rng.randrange(10))
+                expected = []
+                inventory = list(startingItems)
+                remaining = locked
+                while True:
+                    sphere = [entry for entry in remaining if entry[0](inventory)]
+                    if not sphere:
+                        break
+                    expected.append(sorted(key for _, _, key in sphere))
+                    for _, rewards, _ in sphere:
+                        inventory += rewards
+                    remaining = [entry for entry in remaining if entry not in sphere]
+                spheres = findSpheres(Inventory(startingItems), locked)
+                assert [sorted(sphere) for sphere in spheres] == expected
+
+    def test_locationSpheres(self):
+        # every location gets one sphere, starry hill needs pages so it can't be in the first one
+        randomizer = self.createSeed([32],[110],[],[])
+        fakeSessionDict = {}
+        fakeSessionDict["seedModifiers"] = []
+        fakeSessionDict["startingInventory"] = []
+        fakeSessionDict["itemPlacementDifficulty"] = "Normal"
+        validator = SeedValidator(fakeSessionDict)
+        assert validator.validateSeed(fakeSessionDict, randomizer)==True
+        locations = [location for location, sphere in validator.locationSpheres]
+        assert len(locations) == len(set(map(id, locations)))
+        spheres = {location.Id: sphere for location, sphere in validator.locationSpheres if isinstance(location, KH2Treasure)}
+        assert spheres[312] > 1
+
     @staticmethod
     def validateSeed(randomizer):
         fakeSessionDict = {}
         fakeSessionDict["seedModifiers"] = []
         fakeSessionDict["startingInventory"] = []
+        fakeSessionDict["itemPlacementDifficulty"] = "Normal"
         validator = SeedValidator(fakeSessionDict)
         return validator.validateSeed(fakeSessionDict, randomizer)
 
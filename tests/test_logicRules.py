@@ -0,0 +1,186 @@
+import sys
+sys.path.append("..")
+from Module.logicRules import LogicRuleCompiler, getRuleCompiler, getDependents
+from Module.itemPlacementRestriction import ItemPlacementRestriction
+from Module.importantItems import getLogicItems
+from Module.seedEvaluation import Inventory, DependencyRecorder
+import unittest, random
+
+
+def legacyRestrictions(mode, nightmare):
+    # the hand written rules placementRules.json replaced, kept to check the compiled rules against
+    need_fire_blizzard_thunder = lambda inventory : (21 in inventory and 22 in inventory and 23 in inventory)
+    need_1_magnet = lambda inventory : (inventory.count(87)>=1)
+    need_2_magnets = lambda inventory : (inventory.count(87)>=2)
+    need_2_magnets_all_thunders = lambda inventory : (inventory.count(87)>=2 and inventory.count(23)==3)
+    count_high_jumps = lambda inventory : ((94 in inventory) + (95 in inventory) + (96 in inventory) + (97 in inventory))
+    count_quick_runs = lambda inventory : ((98 in inventory) + (99 in inventory) + (100 in inventory) + (101 in inventory))
+    count_aerial_dodges = lambda inventory : ((102 in inventory) + (103 in inventory) + (104 in inventory) + (105 in inventory))
+    count_glides = lambda inventory : ((106 in inventory) + (107 in inventory) + (108 in inventory) + (109 in inventory))
+    need_growths = lambda inventory : (count_high_jumps(inventory)>=3 and count_quick_runs(inventory)>=3 and count_aerial_dodges(inventory)>=3 and count_glides(inventory)>=3)
+    need_proof_connection = lambda inventory : (593 in inventory)
+    need_proof_peace = lambda inventory : (595 in inventory)
+    has_valor = lambda inventory : (26 in inventory)
+    has_wisdom = lambda inventory : (27 in inventory)
+    has_limit = lambda inventory : (563 in inventory)
+    has_master = lambda inventory : (31 in inventory)
+    has_final = lambda inventory : (29 in inventory)
+    has_auto_valor = lambda inventory : (385 in inventory)
+    has_auto_wisdom = lambda inventory : (386 in inventory)
+    has_auto_limit = lambda inventory : (568 in inventory)
+    has_auto_master = lambda inventory : (387 in inventory)
+    has_auto_final = lambda inventory : (388 in inventory)
+    count_forms = lambda inventory : (has_valor(inventory) + has_wisdom(inventory) + has_limit(inventory) + has_master(inventory) + has_final(inventory))
+    count_auto_forms = lambda inventory : (has_auto_valor(inventory) + has_auto_wisdom(inventory) + has_auto_limit(inventory) + has_auto_master(inventory) )
+    need_forms  = lambda inventory : (count_forms(inventory)==5)
+    need_summons = lambda inventory : (( 159 in inventory) and ( 160 in inventory) and ( 25 in inventory) and ( 383 in inventory))
+    need_forms_and_summons = lambda inventory : (need_forms(inventory) and need_summons(inventory))
+    count_pages = lambda inventory : inventory.count(32)
+    need_1_page = lambda inventory : count_pages(inventory) >= 1
+    need_2_pages = lambda inventory : count_pages(inventory) >= 2
+    need_3_pages = lambda inventory : count_pages(inventory) >= 3
+    need_4_pages = lambda inventory : count_pages(inventory) >= 4
+    need_5_pages = lambda inventory : count_pages(inventory) == 5
+
+    if mode=="Reverse":
+        print("Reverse Rando Restrictions")
+        restricted_treasures = [([34,486,303,545,550,250,251,35,36,137,138,487,37,502,503,300],need_fire_blizzard_thunder),
+                                ([287],need_1_magnet),
+                                ([367],need_2_magnets_all_thunders),
+                                ([587,591],need_proof_connection),
+                                ([560],need_forms),
+                                ([518],need_forms_and_summons),
+                                ([313,97,98], need_5_pages),
+                                ([103,104,105], need_4_pages),
+                                ([100,101,314], need_3_pages),
+                                ([106,107,108], need_2_pages),
+                                ([110,111,112,113,115,116,284,485], need_1_page)]
+        restricted_bonuses = [([15,37,42,46],need_fire_blizzard_thunder)]
+    else: #regular seed restrictions
+        restricted_treasures = [([34,486,303,545,550],need_fire_blizzard_thunder),
+                                ([287],need_2_magnets),
+                                ([279,538],need_2_magnets_all_thunders),
+                                ([562,563,564,565,566,567,568,569,570,571,572,573,574,575,576,577,578,579,580,581,582],need_growths),
+                                ([587,591],need_proof_connection),
+                                ([588,589],need_proof_peace),
+                                ([560],need_forms),
+                                ([518],need_forms_and_summons),
+                                ([103,104,105], need_1_page),
+                                ([100,101,314], need_2_pages),
+                                ([106,107,108], need_3_pages),
+                                ([110,111,112,113,115,116,284,485], need_4_pages),
+                                ([285,539,312,94], need_5_pages)]
+
+        restricted_bonuses = [([15],need_fire_blizzard_thunder)]
+
+
+    def make_form_lambda(form_id,form_level):
+        if form_id==1:
+            return lambda inventory : has_valor(inventory) and count_forms(inventory)>=form_level-2
+        if form_id==2:
+            return lambda inventory : has_wisdom(inventory) and count_forms(inventory)>=form_level-2
+        if form_id==3:
+            return lambda inventory : has_limit(inventory) and count_forms(inventory)>=form_level-2
+        if form_id==4:
+            return lambda inventory : has_master(inventory) and count_forms(inventory)>=form_level-2
+        if form_id==5:
+            return lambda inventory : has_final(inventory) and count_forms(inventory)>=form_level-2
+
+        return lambda inventory : False
+
+    def make_form_lambda_nightmare(form_id,form_level):
+        final_possible_but_not_obtained = lambda inventory : (has_valor(inventory) or has_wisdom(inventory) or has_limit(inventory) or has_master(inventory) or count_auto_forms(inventory)>=1) and not has_final(inventory)
+        form_level_obtainable = lambda inventory : count_forms(inventory) + (1 if final_possible_but_not_obtained(inventory) else 0) + 2
+
+        if form_id==1:
+            return lambda inventory : (has_valor(inventory) or has_auto_valor(inventory) ) and form_level_obtainable(inventory)>=form_level
+        if form_id==2:
+            return lambda inventory : (has_wisdom(inventory) or has_auto_wisdom(inventory) ) and form_level_obtainable(inventory)>=form_level
+        if form_id==3:
+            return lambda inventory : (has_limit(inventory) or has_auto_limit(inventory) ) and form_level_obtainable(inventory)>=form_level
+        if form_id==4:
+            return lambda inventory : (has_master(inventory) or has_auto_master(inventory) ) and form_level_obtainable(inventory)>=form_level
+        if form_id==5:
+            have_final_form = lambda inventory : final_possible_but_not_obtained(inventory) or has_final(inventory)
+            if form_level==2:
+                return lambda inventory : have_final_form(inventory) or has_auto_final(inventory)
+            else:
+                return lambda inventory : have_final_form(inventory) and form_level_obtainable(inventory)>=form_level
+
+        return lambda inventory : False
+
+    restricted_forms = [(form_id, form_level, (make_form_lambda_nightmare if nightmare else make_form_lambda)(form_id, form_level)) for form_id in range(1, 6) for form_level in range(2, 8)]
+    restricted_puzzles = [(1,need_growths),
+                          (2,need_growths),
+                          (3,need_growths),
+                          (4,lambda inventory : need_growths(inventory) and need_5_pages(inventory)),
+                          (5,need_growths)]
+    return restricted_treasures, restricted_bonuses, restricted_forms, restricted_puzzles
+
+
+class Tests(unittest.TestCase):
+    def test_matchesLegacyRules(self):
+        rng = random.Random("test_matchesLegacyRules")
+        logicItems = getLogicItems() + [32]*5 + [87, 87, 23, 23, 21]
+        for mode, nightmare in [("Regular", False), ("Reverse", False), ("Regular", True), ("Reverse", True)]:
+            treasures, bonuses, forms, puzzles = ItemPlacementRestriction(mode, nightmare).get_restriction_tables()
+            legacyTreasures, legacyBonuses, legacyForms, legacyPuzzles = legacyRestrictions(mode, nightmare)
+            pairs = []
+            for table, legacy in [(treasures, legacyTreasures), (bonuses, legacyBonuses)]:
+                assert set(table) == {locationId for locations, condition in legacy for locationId in locations}
+                seen = set()
+                for locations, condition in legacy:
+                    pairs += [(table[locationId], condition) for locationId in locations if locationId not in seen]
+                    seen.update(locations)
+            assert set(forms) == {(formId, formLevel) for formId, formLevel, condition in legacyForms}
+            pairs += [(forms[(formId, formLevel)], condition) for formId, formLevel, condition in legacyForms]
+            assert set(puzzles) == {puzzleId for puzzleId, condition in legacyPuzzles}
+            pairs += [(puzzles[puzzleId], condition) for puzzleId, condition in legacyPuzzles]
+            for i in range(300):
+                inventoryList = rng.sample(logicItems, rng.randrange(len(logicItems) + 1))
+                inventory = Inventory(inventoryList)
+                for compiled, condition in pairs:
+                    assert compiled(inventoryList) == condition(inventoryList)
+                    assert compiled(inventory) == condition(inventoryList)
+
+    def test_dependencies(self):
+        compiler = getRuleCompiler()
+        treasures, bonuses, forms, puzzles = compiler.getRuleset("Regular")
+        assert treasures[34].dependencies == {21, 22, 23}
+        assert puzzles[4].dependencies == set(range(94, 110)) | {32}
+        dependents = getDependents({"treasure": treasures, "bonus": bonuses})
+        assert ("treasure", 287) in dependents[87] and ("bonus", 15) in dependents[21]
+
+    def test_maskTests(self):
+        compiler = LogicRuleCompiler({"definitions": {"thunder": {"item": 23}}})
+        rule = compiler.compile({"all": [{"item": 21}, {"item": 22}, "thunder", {"any": [{"item": 87, "atLeast": 2}, {"item": 32}]}]})
+        # items that only have to be present are answered by the mask, not by `in`
+        class MaskOnly:
+            def __contains__(self, itemId):
+                return itemId == 32
+            def count(self, itemId):
+                return 0
+            def presentMask(self, mask, itemIds):
+                return mask
+        assert rule.predicate(MaskOnly())
+        assert rule.predicate([21, 22, 23, 32]) and not rule.predicate([21, 22, 32])
+        inventory = Inventory([21, 21, 23])
+        assert inventory.mask == 1 << 21 | 1 << 23
+        recorder = DependencyRecorder(inventory)
+        assert not rule.predicate(recorder)
+        assert {21, 22, 23} <= set(recorder.itemIds)
+        inventory += [22, 87, 87]
+        assert rule.predicate(inventory)
+
+    def test_rejectsBadRules(self):
+        with self.assertRaises(ValueError):
+            LogicRuleCompiler({"definitions": {}}).compile("missing")
+        with self.assertRaises(ValueError):
+            LogicRuleCompiler({"definitions": {"loop": {"all": ["loop"]}}}).compile("loop")
+        with self.assertRaises(ValueError):
+            LogicRuleCompiler({}).compile({"some": 1})
+
+
+ut = Tests()
+
+unittest.main()
@@ -0,0 +1,31 @@
+import sys
+sys.path.append("..")
+from Module.metrics import Counter, Histogram
+import unittest
+
+
+class Tests(unittest.TestCase):
+    def test_histogramBucketsAreCumulative(self):
+        histogram = Histogram("test_duration_seconds", "Test histogram.", ["stage"], buckets=(0.1, 1.0))
+        histogram.observe(0.05, stage="a")
+        histogram.observe(0.5, stage="a")
+        histogram.observe(5, stage="a")
+        lines = histogram.render()
+        assert 'test_duration_seconds_bucket{stage="a",le="0.1"} 1' in lines
+        assert 'test_duration_seconds_bucket{stage="a",le="1.0"} 2' in lines
+        assert 'test_duration_seconds_bucket{stage="a",le="+Inf"} 3' in lines
+        assert 'test_duration_seconds_sum{stage="a"} 5.55' in lines
+        assert 'test_duration_seconds_count{stage="a"} 3' in lines
+
+    def test_counterByLabel(self):
+        counter = Counter("test_retries_total", "Test counter.", ["reason"])
+        counter.inc(reason="hints")
+        counter.inc(reason="uncompletable")
+        counter.inc(reason="uncompletable")
+        assert counter.get(reason="uncompletable") == 2
+        assert 'test_retries_total{reason="hints"} 1.0' in counter.render()
+
+
+ut = Tests()
+
+unittest.main()
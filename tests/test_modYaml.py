@@ -0,0 +1,124 @@
+import sys
+sys.path.append("..")
+from Class.modYml import modYml
+from Module.modYaml import dumpYaml, dumpMod, writePlain, taglessEmitter, TaglessDumper, UnsupportedValue
+from Module.randomize import KH2Randomizer
+import unittest, hashlib, importlib.util, io, os, yaml, zipfile
+
+# generateZip reads its static files relative to the repository root
+os.chdir(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+noEnemies = {"boss": "Disabled", "enemy": "Disabled", "remove_damage_cap": False}
+
+
+class Tests(unittest.TestCase):
+    def test_sameAsYamlDump(self):
+        # every way dumpYaml writes a file has to give the bytes the python emitter gives
+        cases = [
+            modYml.getSysYAML(["rank-s", "rank-a"]),
+            modYml.getJMYAML(),
+            modYml.getDefaultMod(),
+            {245: {"ItemId": 393}, 1: {"ItemId": 0}},
+            [{"Character": "Sora", "Level": 1, "Padding": [0] * 3, "Items": []}, {"Done": True, "Empty": {}}],
+            {"yes": "no", "Id": "null", "Text": "two words", "Nested": [[1, 2], [{"a": [3]}]]},
+            {"": 1, "x" * 100: "long key", "Tuple": (1, 2)},
+            [],
+            8266,
+        ]
+        for data in cases:
+            assert dumpYaml(data) == yaml.dump(data, Dumper=TaglessDumper, line_break="\r\n")
+
+    def test_longEscapedString(self):
+        # written by the python emitter, LibYAML would break the line without the escaped "\\"
+        data = [{"en": "Le coffre \u00e0 c\u00f4t\u00e9 de la fontaine de la Cit\u00e9 du Cr\u00e9puscule renferme un objet tr\u00e8s utile pour la suite de l'aventure, \u00e9l\u00e9mentaire.", "id": 19482}]
+        golden = b'- en: "Le coffre \\xE0 c\\xF4t\\xE9 de la fontaine de la Cit\\xE9 du Cr\\xE9puscule renferme\\\r\n    \\ un objet tr\\xE8s utile pour la suite de l\'aventure, \\xE9l\\xE9mentaire."\r\n  id: 19482\r\n'
+        assert dumpYaml(data).encode() == golden
+
+    def test_listPatchesWrittenDirectly(self):
+        randomizer = self.createSeed("test_modYaml")
+        patches = randomizer.generateZip(enemyOptions=noEnemies, randomBGM=[])
+        with zipfile.ZipFile(patches) as outZip:
+            for name in ["TrsrList.yml", "BonsList.yml", "LvupList.yml", "FmlvList.yml", "ItemList.yml", "PlrpList.yml"]:
+                data = yaml.safe_load(io.BytesIO(outZip.read(name)))
+                writePlain(data, "\r\n")
+            with self.assertRaises(UnsupportedValue):
+                writePlain(yaml.safe_load(io.BytesIO(outZip.read("sys.yml"))), "\r\n")
+
+    def test_goldenFiles(self):
+        # the files of a fixed seed, hashed from what generateZip wrote with yaml.dump
+        golden = {
+            "TrsrList.yml": "48a93b5f673abaec3bd7772d7dc1173a65a263f38a4b5e78663856aba585a02a",
+            "BonsList.yml": "176fc304adbed65f4c3c274bf961df2076795c722288afd3d2eea4ad8e6f3da9",
+            "LvupList.yml": "98deac40ec3c3f1c71889e9e6fa142e9e12110fc8d3d2c4cbc81b96cb67471d3",
+            "FmlvList.yml": "c6156db9431ab8d86e296c45f7d01810a9d6fb66f063351ea7381c10de96b63f",
+            "ItemList.yml": "f98508942f4270feb64083a4834808d6ff3eb3bb5c726423203be7b93bfd47ed",
+            "PlrpList.yml": "0e4f4f40898b087fd9a183846dcef4dd925aec544c6f80820e30e8d4af846509",
+            "sys.yml": "50eaff542820bb00d6472ba113e43d4501a65324d0e33749f9621c39b8da197d",
+            "jm.yml": "6d950eab485c5b6a074a3c369a0b08ac7e1d085b4fd838758d6f9a041b41c9bf",
+            "mod.yml": "77c69b1df15f449f0333f597a450f1076ac26f21a2dc9576452788ec646cca91",
+        }
+        randomizer = self.createSeed("test_modYaml")
+        with zipfile.ZipFile(randomizer.generateZip(enemyOptions=noEnemies, cmdMenuChoice="randAll", randomBGM=["KH2"], platform="PC")) as outZip:
+            for name, digest in golden.items():
+                data = outZip.read(name)
+                assert hashlib.sha256(data).hexdigest() == digest, name
+                # reading a file back and writing it again has to give the same bytes too
+                assert dumpYaml(yaml.safe_load(io.BytesIO(data))).encode() == data, name
+
+    def test_modSpliced(self):
+        # the default assets are written once, the mod has to come out as if it was written whole
+        bgm = {"name": "bgm/music050.bgm", "method": "copy", "source": [{"name": "bgm/Kingdom Hearts/Dearly Beloved.bgm"}]}
+        mods = [modYml.getDefaultMod() for i in range(6)]
+        mods[1]["assets"] += [modYml.getPuzzleMod(), bgm]
+        mods[2]["title"] += " test_modYaml"
+        # changed default assets, a key after the assets and an alias into the default assets can't be spliced
+        mods[3]["assets"][2]["source"].append({"name": "enemies", "method": "copy"})
+        mods[4]["version"] = 2
+        mods[5]["assets"].append(mods[5]["assets"][0]["multi"])
+        for mod in mods:
+            assert dumpMod(mod) == yaml.dump(mod, Dumper=TaglessDumper, line_break="\r\n")
+
+    def test_noGlobalPatch(self):
+        process_tag = yaml.emitter.Emitter.process_tag
+        self.createSeed("test_modYaml").generateZip(enemyOptions=noEnemies, randomBGM=[])
+        assert yaml.emitter.Emitter.process_tag is process_tag
+        assert "!!" in yaml.dump((1, 2))
+
+    def test_taglessEmitterIsScoped(self):
+        process_tag = yaml.emitter.Emitter.process_tag
+        with taglessEmitter():
+            assert yaml.dump({"Tuple": (1, 2)}) == "Tuple:\n- 1\n- 2\n"
+        assert yaml.emitter.Emitter.process_tag is process_tag
+        with self.assertRaises(ValueError):
+            with taglessEmitter():
+                raise ValueError()
+        assert yaml.emitter.Emitter.process_tag is process_tag
+
+    @unittest.skipUnless(importlib.util.find_spec("khbr"), "khbr isn't installed")
+    def test_enemyFilesTagless(self):
+        # khbr dumps its own yml, none of it may carry python tags the mod loader can't read
+        process_tag = yaml.emitter.Emitter.process_tag
+        randomizer = self.createSeed("test_modYaml")
+        enemies = {"boss": "One to One", "enemy": "One to One", "remove_damage_cap": False}
+        with zipfile.ZipFile(randomizer.generateZip(enemyOptions=enemies, randomBGM=[], platform="PC")) as outZip:
+            names = [name for name in outZip.namelist() if name.endswith(".yml")]
+            for name in names:
+                assert b"!!" not in outZip.read(name), name
+        assert yaml.emitter.Emitter.process_tag is process_tag
+
+    @staticmethod
+    def createSeed(seedName):
+        randomizer = KH2Randomizer(seedName = seedName, seedHashIcons = ["rank-s", "rank-a"])
+        randomizer.populateLocations([])
+        randomizer.populateItems(promiseCharm = True, startingInventory = [], abilityListModifier=None)
+        randomizer.setKeybladeAbilities()
+        randomizer.setNoAP(False)
+        randomizer.setRewards()
+        randomizer.setLevels(5,{'0':3, '1':3, '2':3, '3':3, '4':3, '5':3})
+        randomizer.setBonusStats()
+        return randomizer
+
+
+ut = Tests()
+
+unittest.main()
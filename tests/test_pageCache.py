@@ -0,0 +1,27 @@
+import sys
+sys.path.append("..")
+from Module.pageCache import DailyPageCache
+import unittest, datetime
+
+
+class Tests(unittest.TestCase):
+    def test_rendersOncePerDay(self):
+        renders = []
+        def render(date):
+            renders.append(date)
+            return "page for {}".format(date)
+        cache = DailyPageCache()
+        today = datetime.date(2021, 6, 1)
+        first = cache.get(today, render)
+        assert cache.get(today, render) is first
+        assert renders == [today]
+
+        tomorrow = cache.get(today + datetime.timedelta(days=1), render)
+        assert tomorrow.html == "page for 2021-06-02"
+        assert tomorrow.etag != first.etag
+        assert len(renders) == 2
+
+
+ut = Tests()
+
+unittest.main()
@@ -0,0 +1,89 @@
+import sys
+sys.path.append("..")
+from Module.permalinkStore import PermalinkStore, decodeSettings
+from sessionSettings import getDefaultSession
+import unittest, json
+
+
+class DictRedis(dict):
+    def __init__(self, clock=lambda: 0):
+        super().__init__()
+        self.clock = clock
+        self.expires = {}
+
+    def set(self, key, value, ex=None):
+        self[key] = value
+        self.ex = ex
+        if ex is not None:
+            self.expires[key] = self.clock() + ex
+
+    def get(self, key, default=None):
+        if key in self.expires and self.clock() >= self.expires[key]:
+            del self[key], self.expires[key]
+        return super().get(key, default)
+
+    def ttl(self, key):
+        if key in self.expires:
+            return self.expires[key] - self.clock()
+        return -1 if key in self else -2
+
+    def hgetall(self, key):
+        return self.get(key, {})
+
+
+class Tests(unittest.TestCase):
+    def test_roundTrip(self):
+        redisClient = DictRedis()
+        PermalinkStore(redisClient, ttl=3600).save("ABCDEFGH", self.createSettings())
+        assert redisClient.ex == 3600
+        assert decodeSettings(redisClient["permalink:ABCDEFGH"]) == self.createSettings()
+        # a fresh store has nothing in memory and has to read the blob back
+        assert PermalinkStore(redisClient).load("ABCDEFGH") == self.createSettings()
+
+    def test_legacyHash(self):
+        redisClient = DictRedis()
+        redisClient["ABCDEFGH"] = {key.encode('utf-8'): json.dumps(value).encode('utf-8') for key, value in self.createSettings().items()}
+        assert PermalinkStore(redisClient).load("ABCDEFGH") == self.createSettings()
+        assert PermalinkStore(redisClient).load("MISSING") is None
+
+    def test_memoryCacheReturnsCopies(self):
+        store = PermalinkStore(DictRedis(), cacheSize=1)
+        store.save("FIRST", self.createSettings())
+        settings = store.load("FIRST")
+        settings["includeList"].clear()
+        assert store.load("FIRST") == self.createSettings()
+        store.save("SECOND", self.createSettings())
+        assert "FIRST" not in store._cache
+
+    def test_memoryCacheExpires(self):
+        # a permalink that expired in redis can't be served from memory on one worker and be missing on another
+        now = [0]
+        clock = lambda: now[0]
+        redisClient = DictRedis(clock)
+        store = PermalinkStore(redisClient, ttl=3600, clock=clock)
+        store.save("ABCDEFGH", self.createSettings())
+        now[0] = 1800
+        other = PermalinkStore(redisClient, ttl=3600, clock=clock)
+        assert other.load("ABCDEFGH") == self.createSettings()
+        now[0] = 3599
+        assert store.load("ABCDEFGH") == self.createSettings()
+        assert other.load("ABCDEFGH") == self.createSettings()
+        now[0] = 3600
+        assert store.load("ABCDEFGH") is None
+        assert other.load("ABCDEFGH") is None
+        assert "ABCDEFGH" not in store._cache
+
+    def test_memoryCacheWithoutTtl(self):
+        now = [0]
+        store = PermalinkStore(None, clock=lambda: now[0])
+        store.save("ABCDEFGH", self.createSettings())
+        now[0] = 10**9
+        assert store.load("ABCDEFGH") == self.createSettings()
+
+    @staticmethod
+    def createSettings():
+        return getDefaultSession(seed="test_permalinkStore", permaLink="ABCDEFGH")
+
+ut = Tests()
+
+unittest.main()
@@ -0,0 +1,118 @@
+import sys
+sys.path.append("..")
+from Module.placement import FenwickTree, PlacementPool
+from Class.locationClass import KH2Treasure
+from Class.itemClass import KH2Item
+from List.configDict import itemType, locationDepth
+from Module.randomize import KH2Randomizer
+from Module.seedGeneration import SeedGenerator, addModifierStartingInventory, uncompletableError
+from sessionSettings import getDefaultSession
+import unittest, random, collections
+
+
+class Tests(unittest.TestCase):
+    def test_fenwickFind(self):
+        tree = FenwickTree([3, 0, 1, 5, 2])
+        found = [tree.find(target) for target in range(tree.total)]
+        assert found == [0, 0, 0, 2, 3, 3, 3, 3, 3, 4, 4]
+        tree.add(3, -5)
+        assert tree.total == 6
+        assert [tree.find(target) for target in range(tree.total)] == [0, 0, 0, 2, 4, 4]
+
+    def test_drawsOnlyAllowedLocations(self):
+        locations = self.createLocations()
+        pool = PlacementPool(locations)
+        proof = KH2Item(593, "Proof of Connection", itemType.PROOF_OF_CONNECTION)
+        rng = random.Random("test_drawsOnlyAllowedLocations")
+        for i in range(500):
+            location = pool.locations[pool.draw(proof, True, rng)]
+            assert itemType.PROOF_OF_CONNECTION not in location.InvalidChecks
+
+    def test_reportOnlyDepth(self):
+        pool = PlacementPool(self.createLocations(), locationDepth.FirstBoss)
+        magic = KH2Item(21, "Fire Element", itemType.FIRE)
+        report = KH2Item(226, "Secret Ansem's Report 1", itemType.REPORT)
+        rng = random.Random("test_reportOnlyDepth")
+        for i in range(200):
+            assert pool.locations[pool.draw(magic, True, rng)].LocationDepth != locationDepth.FirstBoss
+        drawn = collections.Counter(pool.draw(report, True, rng) for i in range(4000))
+        # reports ignore the location weights when the depth is restricted
+        assert min(drawn.values()) > 4000 / len(drawn) * 0.7
+
+    def test_weightedDistribution(self):
+        # the same distribution as the old rejection sampling: proportional to weight among the allowed locations
+        locations = self.createLocations()
+        pool = PlacementPool(locations)
+        proof = KH2Item(593, "Proof of Connection", itemType.PROOF_OF_CONNECTION)
+        rng = random.Random("test_weightedDistribution")
+        draws = 20000
+        drawn = collections.Counter(pool.draw(proof, True, rng) for i in range(draws))
+        allowed = [index for index, location in enumerate(locations) if itemType.PROOF_OF_CONNECTION not in location.InvalidChecks]
+        totalWeight = sum(locations[index].LocationWeight for index in allowed)
+        for index in allowed:
+            expected = draws * locations[index].LocationWeight / totalWeight
+            assert abs(drawn[index] - expected) < 5 * expected ** 0.5 + 5
+
+    def test_takeRemovesLocation(self):
+        pool = PlacementPool(self.createLocations())
+        item = KH2Item(1, "Potion", itemType.JUNK)
+        rng = random.Random("test_takeRemovesLocation")
+        taken = set()
+        for i in range(len(pool.locations)):
+            index = pool.draw(item, False, rng)
+            assert index not in taken
+            pool.take(index)
+            taken.add(index)
+        assert pool.getOpenLocations() == []
+        with self.assertRaises(ValueError):
+            pool.draw(item, False, rng)
+
+    def test_logicAwarePlacementIsCompletable(self):
+        for modifiers, difficulty in [(["Logic Aware Placement"], "Insane"), (["Logic Aware Placement", "Reverse Rando"], "Nightmare")]:
+            sessionDict = self.createSession(modifiers, difficulty)
+            generator = SeedGenerator(sessionDict)
+            for index in range(10):
+                randomizer, hintsText, error = generator.attempt("test_logicAwarePlacement{}".format(index))
+                assert error != uncompletableError
+
+    def test_earlyAbortMatchesValidator(self):
+        # setRewards only gives up on seeds the validator would have rejected, and catches all of them
+        for modifiers, difficulty in [([], "Nightmare"), (["Reverse Rando"], "Normal")]:
+            sessionDict = self.createSession(modifiers, difficulty)
+            generator = SeedGenerator(sessionDict)
+            for index in range(15):
+                verdicts = []
+                for restrictions in [None, generator.seedValidation.itemRestrictions]:
+                    randomizer = KH2Randomizer(seedName = "test_earlyAbort{}".format(index))
+                    randomizer.populateLocations(generator.excludeList, item_difficulty=difficulty, reportDepth=sessionDict["reportDepth"])
+                    randomizer.populateItems(promiseCharm = True, startingInventory = sessionDict["startingInventory"])
+                    randomizer.setKeybladeAbilities()
+                    completable = randomizer.setRewards(reportDepth=sessionDict["reportDepth"], restrictions=restrictions)
+                    if completable:
+                        randomizer.setLevels(3, {'0':3, '1':3, '2':3, '3':3, '4':3, '5':3})
+                        randomizer.setBonusStats()
+                        completable = generator.seedValidation.validateSeed(dict(sessionDict, startingInventory=list(sessionDict["startingInventory"])), randomizer)
+                    verdicts.append(completable)
+                assert verdicts[0] == verdicts[1]
+
+    @staticmethod
+    def createSession(seedModifiers, difficulty):
+        sessionDict = getDefaultSession(seed="test_logicAwarePlacement", seedModifiers=seedModifiers, itemPlacementDifficulty=difficulty)
+        addModifierStartingInventory(sessionDict)
+        return sessionDict
+
+    @staticmethod
+    def createLocations():
+        locations = []
+        depths = [locationDepth.FirstVisit, locationDepth.SecondVisit, locationDepth.FirstBoss, locationDepth.SecondBoss]
+        for index in range(40):
+            location = KH2Treasure(index, "Treasure {}".format(index), InvalidChecks=[itemType.PROOF_OF_CONNECTION] if index % 3 == 0 else [])
+            location.setLocationWeight([1, 10, 100][index % 3 - 1] if index % 3 else 1)
+            location.setLocationDepth(depths[index % 4])
+            locations.append(location)
+        return locations
+
+
+ut = Tests()
+
+unittest.main()
@@ -0,0 +1,78 @@
+import sys
+sys.path.append("..")
+from Module.seedArchive import SeedArchive, compressionStrategies
+import unittest, io, random, zipfile
+
+
+class Tests(unittest.TestCase):
+    def test_storedSameAsZipFile(self):
+        # without compression the archive has to be the one zipfile writes
+        members = [(zipfile.ZipInfo("TrsrList.yml", (2022, 3, 28, 0, 0, 0)), "1:\r\n  ItemId: 393\r\n"), (zipfile.ZipInfo("modified_jiminy.bar", (2022, 3, 28, 0, 0, 0)), b"\x00" * 1000)]
+        written, archived = io.BytesIO(), io.BytesIO()
+        with zipfile.ZipFile(written, "w") as outZip:
+            for info, data in members:
+                outZip.writestr(info, data)
+        with SeedArchive(archived) as outZip:
+            for info, data in members:
+                outZip.writestr(info, data)
+        assert archived.getvalue() == written.getvalue()
+
+    def test_compressTypeOverridesInfo(self):
+        data = "1:\r\n  ItemId: 393\r\n" * 1000
+        written, archived = io.BytesIO(), io.BytesIO()
+        with zipfile.ZipFile(written, "w") as outZip:
+            outZip.writestr(zipfile.ZipInfo("TrsrList.yml", (2022, 3, 28, 0, 0, 0)), data, zipfile.ZIP_DEFLATED)
+        with SeedArchive(archived) as outZip:
+            outZip.writestr(zipfile.ZipInfo("TrsrList.yml", (2022, 3, 28, 0, 0, 0)), data, zipfile.ZIP_DEFLATED)
+        assert archived.getvalue() == written.getvalue()
+        with zipfile.ZipFile(archived) as outZip:
+            assert outZip.getinfo("TrsrList.yml").compress_type == zipfile.ZIP_DEFLATED
+
+    def test_strategies(self):
+        # big members are deflated on other threads, the archive keeps the order they were written in
+        rng = random.Random("test_strategies")
+        members = [
+            ("mod.yml", "assets:\r\n- name: msg/jp/sys.bar\r\n" * 20000),
+            ("sys.yml", "- en: Important Checks Found\r\n  id: 19482\r\n"),
+            ("enemies/b_40.bar", bytes([0, 1, 2, 3]) * 100000),
+            ("noise.bar", bytes(rng.randrange(256) for i in range(5000))),
+            ("icon.png", b"\x89PNG" * 1000),
+            ("spoilerlog.html", "<html>" * 50000),
+        ]
+        for name in compressionStrategies:
+            archived = io.BytesIO()
+            with SeedArchive(archived, compressionStrategies[name]) as outZip:
+                for memberName, data in members:
+                    outZip.writestr(memberName, data)
+            with zipfile.ZipFile(archived) as outZip:
+                assert outZip.testzip() is None
+                assert outZip.namelist() == [memberName for memberName, data in members]
+                for memberName, data in members:
+                    assert outZip.read(memberName) == (data.encode() if isinstance(data, str) else data)
+                compressed = {info.filename for info in outZip.infolist() if info.compress_type == zipfile.ZIP_DEFLATED}
+            if name == "stored":
+                assert compressed == set()
+            else:
+                assert compressed == {"mod.yml", "enemies/b_40.bar", "spoilerlog.html"}
+
+    def test_unseekableOutput(self):
+        class Sink:
+            def __init__(self):
+                self.chunks = []
+            def write(self, data):
+                self.chunks.append(bytes(data))
+                return len(data)
+            def flush(self):
+                pass
+        sink = Sink()
+        with SeedArchive(sink, compressionStrategies["small"]) as outZip:
+            outZip.writestr("mod.yml", "title: Randomizer Seed\r\n" * 10000)
+            outZip.writestr("jm.yml", "- id: 20279\r\n")
+        with zipfile.ZipFile(io.BytesIO(b"".join(sink.chunks))) as outZip:
+            assert outZip.testzip() is None
+            assert outZip.read("jm.yml") == b"- id: 20279\r\n"
+
+
+ut = Tests()
+
+unittest.main()
@@ -0,0 +1,99 @@
+
+import sys
+sys.path.append("..")
+from sessionSettings import getDefaultSession
+from Module import seedCache
+from Module.seedCache import SeedCache, getSeedDigest
+import unittest, tempfile, os, time
+
+
+class Tests(unittest.TestCase):
+    def test_digestIgnoresPermaLink(self):
+        session = self.createSession()
+        otherSession = self.createSession()
+        otherSession["permaLink"] = "ABCDEFGH"
+        assert getSeedDigest(session, "PC", "vanilla", []) == getSeedDigest(otherSession, "PC", "vanilla", [])
+
+    def test_digestMatchesStoredPermalink(self):
+        # sessions loaded back from a permalink have string keys and reordered worlds
+        session = self.createSession()
+        storedSession = self.createSession()
+        storedSession["formExpMult"] = {str(k): v for k,v in storedSession["formExpMult"].items()}
+        storedSession["includeList"] = list(reversed(storedSession["includeList"]))
+        storedSession["spoilerLog"] = False
+        assert getSeedDigest(session, "PC", "vanilla", []) == getSeedDigest(storedSession, "PC", "vanilla", [])
+
+    def test_digestSeparatesOutputs(self):
+        session = self.createSession()
+        spoilerSession = self.createSession()
+        spoilerSession["spoilerLog"] = "on"
+        digest = getSeedDigest(session, "PC", "vanilla", [])
+        assert digest != getSeedDigest(spoilerSession, "PC", "vanilla", [])
+        assert digest != getSeedDigest(session, "PCSX2", "vanilla", [])
+        assert digest != getSeedDigest(session, "PC", "randAll", [])
+        assert digest != getSeedDigest(session, "PC", "vanilla", ["KH1"])
+
+    def test_digestChangesWithGeneratorVersion(self):
+        session = {"seed": "ABCDEF", "includeList": ["Land of Dragons"]}
+        digest = getSeedDigest(session, "PC", "vanilla", [])
+        previous = seedCache.generatorVersion
+        seedCache.generatorVersion = previous + 1
+        try:
+            assert digest != getSeedDigest(session, "PC", "vanilla", [])
+        finally:
+            seedCache.generatorVersion = previous
+
+    def test_leastRecentlyUsedEviction(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = SeedCache(directory, maxBytes=25)
+            cache.put("first", b"0"*10)
+            cache.put("second", b"1"*10)
+            # make sure the first entry is the most recently used one
+            os.utime(cache.getPath("second"), (time.time()-60, time.time()-60))
+            assert cache.get("first") == b"0"*10
+            cache.put("third", b"2"*10)
+            assert cache.get("second") is None
+            assert cache.get("first") == b"0"*10
+            assert cache.get("third") == b"2"*10
+
+    def test_locateCopiesSharedEntry(self):
+        class DictRedis(dict):
+            def set(self, key, value, ex=None):
+                self[key] = value
+        shared = DictRedis()
+        with tempfile.TemporaryDirectory() as directory, tempfile.TemporaryDirectory() as otherDirectory:
+            SeedCache(directory, redisClient=shared).put("seed", b"zip")
+            cache = SeedCache(otherDirectory, redisClient=shared)
+            assert cache.locate("missing") is None
+            path = cache.locate("seed")
+            assert path == cache.getPath("seed")
+            with open(path, "rb") as cachedZip:
+                assert cachedZip.read() == b"zip"
+
+    def test_writerOnlyKeepsCompleteFiles(self):
+        class DictRedis(dict):
+            def set(self, key, value, ex=None):
+                self[key] = value
+        shared = DictRedis()
+        with tempfile.TemporaryDirectory() as directory:
+            cache = SeedCache(directory, redisClient=shared)
+            with self.assertRaises(ValueError):
+                with cache.writer("failed") as cachedZip:
+                    cachedZip.write(b"half a zip")
+                    raise ValueError("generation failed")
+            with cache.writer("seed") as cachedZip:
+                cachedZip.write(b"z")
+                assert cache.locate("seed") is None
+                cachedZip.write(b"ip")
+            assert cache.get("seed") == b"zip"
+            assert shared[cache.getRedisKey("seed")] == b"zip"
+            assert os.listdir(directory) == ["seed.zip"]
+
+    @staticmethod
+    def createSession():
+        # a session as the randomize page leaves it, with integer form keys and the spoiler checkbox unset
+        return getDefaultSession(seed="test_seedCache", spoilerLog=None, formExpMult={0: 1.0, 1: 5.0, 2: 3.0, 3: 3.0, 4: 2.0, 5: 3.0}, permaLink="HGFEDCBA")
+
+ut = Tests()
+
+unittest.main()
@@ -0,0 +1,76 @@
+
+import sys
+sys.path.append("..")
+from sessionSettings import getDefaultSession
+from Module import seedGeneration
+from Module.seedGeneration import SeedGenerator, candidateSeedName, addModifierStartingInventory
+from Module.metrics import stageDuration
+import unittest, concurrent.futures
+
+
+class Tests(unittest.TestCase):
+    def test_candidateNames(self):
+        # the first candidate is always the requested name, the others only depend on the name and index
+        assert candidateSeedName("test_candidates", 0) == "test_candidates"
+        assert candidateSeedName("test_candidates", 3) == candidateSeedName("test_candidates", 3)
+        assert candidateSeedName("test_candidates", 3) != candidateSeedName("test_candidates", 4)
+
+    def test_parallelSearchIsDeterministic(self):
+        # the lowest valid candidate wins, no matter how many workers race for it
+        results = []
+        for workers in [2, 3]:
+            randomizer, hintsText = SeedGenerator(self.createSession("test_parallelSearch")).search(workers=workers)
+            results.append([(loc.getDescription(), item.Id) for loc, item in randomizer._locationItems])
+            assert randomizer.seedName == "test_parallelSearch"
+        assert results[0] == results[1]
+
+    def test_parallelSearchAfterFailedRebuild(self):
+        # candidates that were cancelled for a winner whose rebuild failed are tried here instead
+        class LazyFuture(concurrent.futures.Future):
+            def __init__(self, call):
+                super().__init__()
+                self.call = call
+            def result(self, timeout=None):
+                if not self.done():
+                    self.set_result(self.call())
+                return super().result(timeout)
+        class LazyExecutor:
+            def submit(self, function, *args):
+                return LazyFuture(lambda: function(*args))
+        generator = SeedGenerator(self.createSession("test_parallelSearchAfterFailedRebuild"))
+        attempted = []
+        def attempt(seedName):
+            attempted.append(seedName)
+            if len(attempted) == 1:
+                return None, None, "rebuild failed"
+            return SeedGenerator.attempt(generator, seedName)
+        generator.attempt = attempt
+        getProcessPool = seedGeneration.getProcessPool
+        seedGeneration.getProcessPool = lambda workers: LazyExecutor()
+        try:
+            generator.search(workers=4)
+        finally:
+            seedGeneration.getProcessPool = getProcessPool
+        first = [candidateSeedName("test_parallelSearchAfterFailedRebuild", index) for index in range(4)].index(attempted[0])
+        assert attempted[1] == candidateSeedName("test_parallelSearchAfterFailedRebuild", first + 1)
+
+    def test_serialSearch(self):
+        randomizer, hintsText = SeedGenerator(self.createSession("test_serialSearch")).search()
+        assert randomizer.seedName == "test_serialSearch"
+        assert hintsText["hintsType"] == "JSmartee"
+
+    def test_stagesAreTimed(self):
+        SeedGenerator(self.createSession("test_stagesAreTimed")).search()
+        recorded = "\n".join(stageDuration.render())
+        for stage in ["populateLocations", "populateItems", "setKeybladeAbilities", "setRewards", "setLevels", "setBonusStats", "validateSeed", "generateHints"]:
+            assert 'stage="{}"'.format(stage) in recorded
+
+    @staticmethod
+    def createSession(seedName):
+        sessionDict = getDefaultSession(seed=seedName)
+        addModifierStartingInventory(sessionDict)
+        return sessionDict
+
+ut = Tests()
+
+unittest.main()
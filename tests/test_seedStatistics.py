@@ -0,0 +1,43 @@
+import sys
+sys.path.append("..")
+from sessionSettings import getDefaultSession
+from Module.seedStatistics import runStatistics, runShard, shardPaths
+import unittest, tempfile, os, csv
+
+
+class Tests(unittest.TestCase):
+    def test_statisticsResume(self):
+        settings = self.createSettings()
+        with tempfile.TemporaryDirectory() as directory:
+            means = runStatistics(settings, ["Normal", "Insane"], 6, 3, directory, processes=1)
+            assert set(means) == {"Normal", "Insane"}
+            assert means["Normal"]["attempts"] >= 1
+
+            # every seed puts each important item somewhere once
+            with open(os.path.join(directory, "frequencies-Normal.csv"), newline="") as frequenciesFile:
+                rows = list(csv.DictReader(frequenciesFile))
+            proofOfConnection = sum(int(row["count"]) for row in rows if row["item"] == "593")
+            assert proofOfConnection == 6
+            with open(os.path.join(directory, "histograms-Insane.csv"), newline="") as histogramsFile:
+                assert sum(int(row["seeds"]) for row in csv.DictReader(histogramsFile) if row["metric"] == "logicDepth") == 6
+
+            # finished shards are skipped, missing ones are generated again with the same seeds
+            metricsPath, placementsPath = shardPaths(directory, "Normal", 1)
+            with open(metricsPath) as metricsFile:
+                metrics = metricsFile.read()
+            os.remove(metricsPath)
+            assert runShard(settings, "Normal", 0, 3, directory) == ("Normal", 0, False)
+            runStatistics(settings, ["Normal", "Insane"], 6, 3, directory, processes=1)
+            with open(metricsPath) as metricsFile:
+                assert metricsFile.read() == metrics
+
+            with self.assertRaises(ValueError):
+                runStatistics(dict(settings, promiseCharm=False), ["Normal"], 6, 3, directory, processes=1)
+
+    @staticmethod
+    def createSettings():
+        return getDefaultSession()
+
+ut = Tests()
+
+unittest.main()
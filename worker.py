@@ -0,0 +1,9 @@
+import redis
+from rq import Worker
+from app import url
+
+# runs queued seed generations when the app is started with GENERATION_QUEUE=redis
+if __name__ == '__main__':
+    # the worker blocks on the queue for minutes at a time, so it can't use the request pool and its socket timeouts
+    connection = redis.Redis(host=url.hostname, port=url.port, ssl=True, ssl_cert_reqs=None, password=url.password)
+    Worker(["generation"], connection=connection).work()